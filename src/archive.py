@@ -0,0 +1,180 @@
+# archive.py
+import os
+import shutil
+import struct
+import threading
+import zipfile
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional
+from config import CONFIG
+from db.archive_repo import ArchiveRepository
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+ARCHIVE_SCHEME = "archive://"
+_LOCAL_HEADER = struct.Struct("<4s5H3I2H")
+
+
+def archive_path(container: str, session_id: str) -> str:
+    # value stored in TriageModel.path for archived sessions
+    return f"{ARCHIVE_SCHEME}{container}#{session_id}"
+
+
+def is_archive_path(path: Optional[str]) -> bool:
+    return bool(path) and path.startswith(ARCHIVE_SCHEME)
+
+
+def parse_archive_path(path: str):
+    container, _, session_id = path[len(ARCHIVE_SCHEME):].partition("#")
+    return container, session_id
+
+
+class SessionArchive:
+    # Finished sessions are packed into one append-only zip per day
+    # (CONFIG.ARCHIVE_DIR/YYYY-MM-DD.zip). Members are stored uncompressed, and the
+    # absolute offset of each member's bytes goes into the archive_entries table, so
+    # reading an artifact is a lookup plus a ranged read (seek + read). No zip
+    # directory parsing and no per-session directory listing are needed.
+    # Appends to a container are serialized across processes with a lock file next
+    # to it (the UI and archive_sessions.py may pack into the same day), and the
+    # zip append plus the DB rows either both land or the zip is restored.
+    def __init__(self, archive_dir: Optional[str] = None):
+        self.archive_dir = archive_dir or CONFIG.ARCHIVE_DIR
+        self._lock = threading.Lock()
+
+    def container_for(self, day: datetime) -> str:
+        return f"{day:%Y-%m-%d}.zip"
+
+    def pack_session(self, session_dir: str, code: Optional[str] = None,
+                     day: Optional[datetime] = None, remove: bool = True) -> str:
+        session_id = os.path.basename(os.path.normpath(session_dir))
+        names = sorted(n for n in os.listdir(session_dir)
+                       if os.path.isfile(os.path.join(session_dir, n)) and not n.endswith(".tmp"))
+        day = day or datetime.fromtimestamp(os.path.getmtime(session_dir))
+        container = self.container_for(day)
+        container_path = os.path.join(self.archive_dir, container)
+        os.makedirs(self.archive_dir, exist_ok=True)
+
+        with self._lock, _file_lock(container_path + ".lock"):
+            with ArchiveRepository() as repo:
+                if repo.has_session(session_id):
+                    raise ValueError(f"Sessão {session_id} já arquivada")
+
+            saved = _save_tail(container_path)
+            try:
+                entries = []
+                with zipfile.ZipFile(container_path, "a", compression=zipfile.ZIP_STORED) as zf:
+                    for name in names:
+                        member = f"{session_id}/{name}"
+                        zf.write(os.path.join(session_dir, name), member)
+                        info = zf.getinfo(member)
+                        entries.append({"member": member, "header_offset": info.header_offset,
+                                        "size": info.file_size})
+                with open(container_path, "rb") as f:
+                    for e in entries:
+                        e["offset"] = _data_offset(f, e.pop("header_offset"))
+
+                with ArchiveRepository() as repo:
+                    repo.add_many([
+                        {"session_id": session_id, "code": code or session_id, "container": container,
+                         "member": e["member"], "offset": e["offset"], "size": e["size"]}
+                        for e in entries
+                    ])
+            except BaseException:
+                _restore_tail(container_path, saved)
+                raise
+
+        if remove:
+            shutil.rmtree(session_dir, ignore_errors=True)
+        return archive_path(container, session_id)
+
+    def read(self, session_id: str, name: str) -> Optional[bytes]:
+        with ArchiveRepository() as repo:
+            entry = repo.get(session_id, f"{session_id}/{name}")
+        if entry is None:
+            return None
+        return self._read_range(entry["container"], entry["offset"], entry["size"])
+
+    def extract(self, session_id: str, name: str, dest_path: str) -> bool:
+        data = self.read(session_id, name)
+        if data is None:
+            return False
+        with open(dest_path, "wb") as f:
+            f.write(data)
+        return True
+
+    def _read_range(self, container: str, offset: int, size: int) -> bytes:
+        if size == 0:
+            return b""
+        with open(os.path.join(self.archive_dir, container), "rb") as f:
+            f.seek(offset)
+            return f.read(size)
+
+
+@contextmanager
+def _file_lock(path: str):
+    # exclusive, blocking lock held on a side file for the whole append
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _save_tail(container_path: str):
+    # Appending rewrites the zip from the start of its central directory, so keep
+    # those bytes: restoring them undoes a failed append exactly.
+    if not os.path.exists(container_path):
+        return None
+    with zipfile.ZipFile(container_path) as zf:
+        start = zf.start_dir
+    with open(container_path, "rb") as f:
+        f.seek(start)
+        return start, f.read()
+
+
+def _restore_tail(container_path: str, saved):
+    if saved is None:
+        if os.path.exists(container_path):
+            os.remove(container_path)
+        return
+    start, tail = saved
+    with open(container_path, "r+b") as f:
+        f.seek(start)
+        f.write(tail)
+        f.truncate()
+
+
+def _data_offset(f, header_offset: int) -> int:
+    f.seek(header_offset)
+    fields = _LOCAL_HEADER.unpack(f.read(_LOCAL_HEADER.size))
+    if fields[0] != b"PK\x03\x04":
+        raise ValueError("Cabeçalho local de zip inválido")
+    name_len, extra_len = fields[-2], fields[-1]
+    return header_offset + _LOCAL_HEADER.size + name_len + extra_len
+
+
+def read_artifact(path: str, name: str) -> Optional[bytes]:
+    # reads `name` (e.g. "triage.json") for a TriageModel.path, archived or not
+    if is_archive_path(path):
+        _, session_id = parse_archive_path(path)
+        return SessionArchive().read(session_id, name)
+    full = os.path.join(path, name)
+    if not os.path.isfile(full):
+        return None
+    with open(full, "rb") as f:
+        return f.read()
@@ -0,0 +1,66 @@
+# archive_sessions.py
+# Packs finished session directories under CONFIG.DATA_DIR into the per-day
+# archive and points their triage rows at the archive entries.
+#
+#   python src/archive_sessions.py --min-age 60
+import argparse
+import json
+import os
+import sys
+import time
+from archive import SessionArchive
+from config import CONFIG
+from db.config import engine
+from db.models import Base
+from db.triage_repo import TriageRepository
+
+
+def is_finished(session_dir):
+    try:
+        with open(os.path.join(session_dir, "triage.json"), encoding="utf-8") as f:
+            return json.load(f).get("status") == "finished"
+    except (OSError, ValueError):
+        return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migra sessões em diretórios para o arquivo compactado")
+    parser.add_argument("--data-dir", default=CONFIG.DATA_DIR)
+    parser.add_argument("--min-age", type=float, default=10, help="minutos desde a última alteração")
+    parser.add_argument("--all", action="store_true", help="inclui sessões não finalizadas")
+    parser.add_argument("--keep", action="store_true", help="não remove os diretórios migrados")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.data_dir):
+        print(f"Diretório não encontrado: {args.data_dir}")
+        return 1
+
+    Base.metadata.create_all(engine)
+    archive = SessionArchive()
+    cutoff = time.time() - args.min_age * 60
+    packed = failed = 0
+    t0 = time.perf_counter()
+
+    with os.scandir(args.data_dir) as it:
+        dirs = [e.path for e in it if e.is_dir()]
+    with TriageRepository() as triages:
+        for session_dir in sorted(dirs):
+            if os.path.getmtime(session_dir) > cutoff:
+                continue
+            if not args.all and not is_finished(session_dir):
+                continue
+            session_id = os.path.basename(session_dir)
+            try:
+                uri = archive.pack_session(session_dir, remove=not args.keep)
+                triages.update_path_by_code(session_id, uri)
+                packed += 1
+            except Exception as e:
+                failed += 1
+                print(f"[{session_id}] falhou: {e}")
+
+    print(f"{packed} sessão(ões) arquivada(s) em {time.perf_counter() - t0:.2f}s, falhas {failed}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
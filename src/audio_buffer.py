@@ -0,0 +1,164 @@
+# audio_buffer.py
+import os
+import queue
+import struct
+import threading
+import numpy as np
+
+_WAV_HEADER_SIZE = 44
+
+
+def _wav_header(samplerate, dtype, channels, n_frames):
+    dtype = np.dtype(dtype)
+    # 1 = integer PCM, 3 = IEEE float
+    fmt_tag = 3 if dtype.kind == "f" else 1
+    block_align = channels * dtype.itemsize
+    data_size = n_frames * block_align
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, fmt_tag, channels, samplerate, samplerate * block_align, block_align, dtype.itemsize * 8,
+        b"data", data_size,
+    )
+
+
+class CaptureBuffer:
+    # Preallocated sample buffer for the audio callback, split into a small pool of
+    # fixed-size blocks. append() only copies samples into the current block; when a
+    # block fills up it is handed to a writer thread, which appends it to a WAV spill
+    # file and returns it to the pool. The callback never touches the disk, and memory
+    # stays flat no matter how long the recording runs.
+    def __init__(self, samplerate, dtype, capacity_seconds, spill_path, channels=1, blocks=4):
+        self.samplerate = samplerate
+        self.dtype = np.dtype(dtype)
+        self.channels = channels
+        self.spill_path = spill_path
+        frames = max(1, int(capacity_seconds * samplerate) // blocks)
+        self._pool_size = blocks
+        self._blocks = [np.empty((frames, channels), dtype=self.dtype) for _ in range(blocks)]
+        self._free = queue.SimpleQueue()
+        self._full = queue.SimpleQueue()
+        self._cur = 0
+        self._pos = 0
+        self._spilled = 0    # frames handed to the writer
+        self._error = None
+        self._refill()
+        self._thread = threading.Thread(target=self._writer, name="capture-spill", daemon=True)
+        self._thread.start()
+
+    def __len__(self):
+        return self._spilled + self._pos
+
+    @property
+    def spilled(self) -> bool:
+        return self._spilled > 0
+
+    @property
+    def seconds(self) -> float:
+        return len(self) / self.samplerate
+
+    def _refill(self):
+        while True:
+            try:
+                self._free.get_nowait()
+            except queue.Empty:
+                break
+        del self._blocks[self._pool_size:]   # drop blocks added under back-pressure
+        self._cur = 0
+        for i in range(1, len(self._blocks)):
+            self._free.put(i)
+
+    def reset(self):
+        # not for the audio thread: waits for the writer to drop any unfinished spill
+        self._sync("discard")
+        self._refill()
+        self._pos = 0
+        self._spilled = 0
+        self._error = None
+        self.discard_spill()
+
+    def append(self, block):
+        n = len(block)
+        written = 0
+        while written < n:
+            buf = self._blocks[self._cur]
+            take = min(n - written, len(buf) - self._pos)
+            buf[self._pos:self._pos + take] = block[written:written + take]
+            self._pos += take
+            written += take
+            if self._pos == len(buf):
+                self._hand_off()
+
+    def _hand_off(self):
+        if not self._pos:
+            return
+        self._full.put(("block", self._cur, self._pos))
+        self._spilled += self._pos
+        self._pos = 0
+        try:
+            self._cur = self._free.get_nowait()
+        except queue.Empty:
+            # the writer is a whole pool behind (very slow disk): grow rather than
+            # block the callback or drop samples
+            self._blocks.append(np.empty_like(self._blocks[0]))
+            self._cur = len(self._blocks) - 1
+
+    def _sync(self, command):
+        done = threading.Event()
+        self._full.put((command, done, None))
+        done.wait()
+
+    def _writer(self):
+        f = None
+        frames = 0
+        while True:
+            command, arg, n = self._full.get()
+            try:
+                if command == "block":
+                    if self._error is None:
+                        if f is None:
+                            f = open(self.spill_path, "wb")
+                            f.write(_wav_header(self.samplerate, self.dtype, self.channels, 0))
+                            frames = 0
+                        f.write(self._blocks[arg][:n])
+                        frames += n
+                    self._free.put(arg)
+                elif command == "finish":
+                    if f is not None:
+                        f.seek(0)
+                        f.write(_wav_header(self.samplerate, self.dtype, self.channels, frames))
+                        f.close()
+                        f = None
+                elif command in ("discard", "close"):
+                    if f is not None:
+                        f.close()
+                        f = None
+                    if command == "close":
+                        return
+            except OSError as e:
+                self._error = e
+            finally:
+                if command != "block":
+                    arg.set()
+
+    def finalize(self):
+        # Returns the recorded samples without copying them: a view of the first block
+        # for short recordings, or a read-only memory map over the finished spill WAV.
+        # Called after the stream is stopped; waits for the writer to catch up.
+        if not self._spilled:
+            return self._blocks[self._cur][:self._pos]
+
+        self._hand_off()
+        self._sync("finish")
+        if self._error is not None:
+            raise self._error
+        return np.memmap(self.spill_path, dtype=self.dtype, mode="r", offset=_WAV_HEADER_SIZE,
+                         shape=(self._spilled, self.channels))
+
+    def discard_spill(self):
+        if os.path.exists(self.spill_path):
+            os.remove(self.spill_path)
+
+    def close(self):
+        if self._thread.is_alive():
+            self._sync("close")
@@ -0,0 +1,30 @@
+# backfill_stats.py
+# Rebuilds the triage_stats summaries from the triages, patients and
+# triage_sessions tables (after an upgrade, or to repair drift), then prints the
+# per-status totals.
+#
+#   python src/backfill_stats.py
+import argparse
+import sys
+import time
+from db.config import engine
+from db.models import Base
+from db.stats_repo import StatsRepository
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reconstrói as tabelas de estatísticas das triagens")
+    parser.parse_args(argv)
+
+    Base.metadata.create_all(engine)
+    t0 = time.perf_counter()
+    with StatsRepository() as stats:
+        groups = stats.rebuild()
+        print(f"{groups} grupo(s) recalculado(s) em {time.perf_counter() - t0:.2f}s")
+        for row in stats.by_status():
+            print(f"  {row['status']:<9} {row['count']:>8} triagem(ns), média de {row['avg_turns']:.1f} turno(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+# bench_db_profiles.py
+# Concurrent insert/read throughput of each SQLite connection profile, on a
+# scratch database per profile.
+#
+#   python src/bench_db_profiles.py --writers 3 --readers 3 --seconds 5
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from sqlalchemy import select, func
+from sqlalchemy.orm import sessionmaker, Session
+from db.config import PROFILES, make_engine
+from db.models import Base, PatientModel, TriageModel
+
+
+def run_profile(profile, writers, readers, seconds):
+    tmp = tempfile.mkdtemp(prefix=f"robo-bench-{profile}-")
+    path = os.path.join(tmp, "bench.db")
+    eng = make_engine(path, profile, pool_size=writers + readers, max_overflow=0)
+    Base.metadata.create_all(eng)
+    make_session = sessionmaker(bind=eng, expire_on_commit=False, class_=Session)
+
+    with make_session() as s:
+        p = PatientModel(name="Bench", cpf="bench-0")
+        s.add(p)
+        s.commit()
+        patient_id = p.id
+
+    stop = time.perf_counter() + seconds
+    counts = {"insert": 0, "read": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def writer(n):
+        i = 0
+        with make_session() as s:
+            while time.perf_counter() < stop:
+                try:
+                    s.add(TriageModel(code=f"w{n}-{i}", date=None, path=None, patient_id=patient_id))
+                    s.commit()
+                    i += 1
+                except Exception:
+                    s.rollback()
+                    with lock:
+                        counts["errors"] += 1
+        with lock:
+            counts["insert"] += i
+
+    def reader():
+        i = 0
+        with make_session() as s:
+            while time.perf_counter() < stop:
+                try:
+                    s.execute(select(func.count(TriageModel.id))).scalar_one()
+                    s.execute(select(TriageModel).order_by(TriageModel.id.desc()).limit(20)).scalars().all()
+                    s.rollback()  # end the read transaction so WAL checkpoints can progress
+                    i += 1
+                except Exception:
+                    with lock:
+                        counts["errors"] += 1
+        with lock:
+            counts["read"] += i
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    eng.dispose()
+
+    for name in os.listdir(tmp):
+        os.remove(os.path.join(tmp, name))
+    os.rmdir(tmp)
+    return counts["insert"] / elapsed, counts["read"] / elapsed, counts["errors"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark dos perfis de conexão SQLite")
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES), choices=list(PROFILES))
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"{'perfil':<12} {'inserts/s':>10} {'leituras/s':>11} {'erros':>6}")
+    for profile in args.profiles:
+        ins, rd, errors = run_profile(profile, args.writers, args.readers, args.seconds)
+        print(f"{profile:<12} {ins:10.1f} {rd:11.1f} {errors:6d}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
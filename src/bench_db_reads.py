@@ -0,0 +1,86 @@
+# bench_db_reads.py
+# Compares the ORM repositories with the Core read path (db/readers.py) for
+# large triage listings, on a scratch database.
+#
+#   python src/bench_db_reads.py --rows 10000 100000
+import argparse
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from db.config import make_engine
+from db.models import Base, TriageModel, PatientModel
+from db.readers import Projection, TriageReader
+from db.triage_repo import TriageRepository
+from sqlalchemy.orm import sessionmaker, Session
+
+
+def measure(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, len(result)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de leitura: repositórios ORM x leitura Core")
+    parser.add_argument("--rows", nargs="+", type=int, default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="robo-bench-reads-")
+    eng = make_engine(os.path.join(tmp, "bench.db"), "throughput")
+    Base.metadata.create_all(eng)
+    make_session = sessionmaker(bind=eng, expire_on_commit=False, class_=Session)
+
+    total = max(args.rows)
+    base = datetime(2024, 1, 1)
+    with eng.begin() as conn:
+        conn.execute(PatientModel.__table__.insert(), [{"name": f"P{i}", "cpf": str(i)} for i in range(1000)])
+        conn.execute(TriageModel.__table__.insert(), [
+            {"code": f"sessao-{i}", "date": (base + timedelta(minutes=i)).isoformat(),
+             "path": f"data/sessions/sessao-{i}", "patient_id": random.randint(1, 1000),
+             "created_at": base + timedelta(seconds=i * 30)}
+            for i in range(total)
+        ])
+
+    def listing(repo_cls, **kwargs):
+        with make_session() as s:
+            return repo_cls(s).list(**kwargs)
+
+    summary = Projection(TriageModel, ("id", "code", "created_at"))
+    print(f"{'linhas':>8} {'método':<26} {'tempo (ms)':>11} {'pico (MB)':>10}")
+    for n in args.rows:
+        cases = [
+            ("ORM list + to_dict", lambda: listing(TriageRepository, limit=n)),
+            ("Core dicts", lambda: listing(TriageReader, limit=n)),
+            ("Core records (__slots__)", lambda: listing(TriageReader, limit=n, shape="record")),
+            ("Core tuples", lambda: listing(TriageReader, limit=n, shape="tuple")),
+            ("Core tuples, 3 colunas", lambda: listing(TriageReader, limit=n, projection=summary, shape="tuple")),
+        ]
+        for name, fn in cases:
+            seconds, peak, count = measure(fn, args.repeat)
+            assert count == n
+            print(f"{n:>8} {name:<26} {seconds * 1000:11.1f} {peak / 1e6:10.1f}")
+
+    eng.dispose()
+    for name in os.listdir(tmp):
+        os.remove(os.path.join(tmp, name))
+    os.rmdir(tmp)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
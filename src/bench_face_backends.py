@@ -0,0 +1,133 @@
+# bench_face_backends.py
+# Replays recorded videos/images through each face detector backend and reports
+# throughput, per-frame latency and agreement with a reference backend.
+#
+#   python src/bench_face_backends.py data/recordings --backends haar lbp yunet
+import argparse
+import os
+import sys
+import time
+import cv2
+import numpy as np
+from face_backends import BACKENDS, create_backend
+
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".bmp"}
+VIDEO_EXTS = {".mp4", ".avi", ".mkv", ".mov", ".webm"}
+
+
+def iter_frames(directory, stride=1, max_frames=None):
+    count = 0
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            ext = os.path.splitext(name)[1].lower()
+            path = os.path.join(root, name)
+            if ext in IMAGE_EXTS:
+                frame = cv2.imread(path)
+                if frame is None:
+                    continue
+                yield frame
+                count += 1
+            elif ext in VIDEO_EXTS:
+                cap = cv2.VideoCapture(path)
+                idx = 0
+                while True:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    if idx % stride == 0:
+                        yield frame
+                        count += 1
+                    idx += 1
+                    if max_frames and count >= max_frames:
+                        break
+                cap.release()
+            if max_frames and count >= max_frames:
+                return
+
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union else 0.0
+
+
+def agreement(ref, other, threshold=0.5):
+    # presence: both found a face or both found none
+    # box: fraction of reference boxes matched by a box with IoU >= threshold
+    presence = (len(ref) > 0) == (len(other) > 0)
+    if not ref:
+        return presence, None
+    matched = sum(1 for r in ref if any(iou(r, o) >= threshold for o in other))
+    return presence, matched / len(ref)
+
+
+def run_backend(backend, frames, downscale):
+    latencies = []
+    results = []
+    for frame in frames:
+        t0 = time.perf_counter()
+        image = frame if backend.needs_color else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if downscale < 1:
+            image = cv2.resize(image, None, fx=downscale, fy=downscale, interpolation=cv2.INTER_AREA)
+        faces = backend.detect(image)
+        latencies.append(time.perf_counter() - t0)
+        results.append([tuple(int(v / downscale) for v in f) for f in faces])
+    return np.array(latencies), results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark dos backends de detecção de rosto")
+    parser.add_argument("directory", help="diretório com vídeos e/ou imagens gravados")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--reference", default=None, help="backend usado como referência (padrão: o primeiro)")
+    parser.add_argument("--downscale", type=float, default=1.0)
+    parser.add_argument("--stride", type=int, default=1, help="usa 1 a cada N frames dos vídeos")
+    parser.add_argument("--max-frames", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    frames = list(iter_frames(args.directory, args.stride, args.max_frames))
+    if not frames:
+        print(f"Nenhum frame encontrado em {args.directory}")
+        return 1
+    print(f"{len(frames)} frames carregados de {args.directory}\n")
+
+    runs = {}
+    for name in args.backends:
+        try:
+            backend = create_backend(name)
+        except Exception as e:
+            print(f"[{name}] ignorado: {e}")
+            continue
+        backend.detect(frames[0] if backend.needs_color else cv2.cvtColor(frames[0], cv2.COLOR_BGR2GRAY))  # warm-up
+        runs[name] = run_backend(backend, frames, args.downscale)
+
+    if not runs:
+        return 1
+
+    ref_name = args.reference if args.reference in runs else next(iter(runs))
+    ref_results = runs[ref_name][1]
+
+    print(f"\n{'backend':<8} {'fps':>8} {'p50 ms':>8} {'p95 ms':>8} {'faces%':>7} {'presença':>9} {'boxes':>7}   (ref: {ref_name})")
+    for name, (lat, results) in runs.items():
+        fps = len(lat) / lat.sum() if lat.sum() else float("inf")
+        p50, p95 = np.percentile(lat, [50, 95]) * 1000
+        with_face = sum(1 for r in results if r) / len(results) * 100
+
+        presence, boxes = [], []
+        for ref, other in zip(ref_results, results):
+            p, b = agreement(ref, other)
+            presence.append(p)
+            if b is not None:
+                boxes.append(b)
+        presence_pct = np.mean(presence) * 100
+        boxes_pct = f"{np.mean(boxes) * 100:6.1f}%" if boxes else "     -"
+        print(f"{name:<8} {fps:8.1f} {p50:8.2f} {p95:8.2f} {with_face:6.1f}% {presence_pct:8.1f}% {boxes_pct}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+# camera_pipeline.py
+import threading
+import time
+from collections import deque
+from config import CONFIG
+from presence import MotionDetector
+
+
+class FpsCounter:
+    def __init__(self, window=2.0):
+        self.window = window
+        self._ticks = deque()
+        self._lock = threading.Lock()
+
+    def tick(self):
+        now = time.monotonic()
+        with self._lock:
+            self._ticks.append(now)
+            while self._ticks and now - self._ticks[0] > self.window:
+                self._ticks.popleft()
+
+    @property
+    def fps(self) -> float:
+        now = time.monotonic()
+        with self._lock:
+            while self._ticks and now - self._ticks[0] > self.window:
+                self._ticks.popleft()
+            return len(self._ticks) / self.window
+
+
+# Capture -> detect -> render stages decoupled by single-slot buffers.
+# Capture only keeps the newest frame, the detector takes whatever is newest when
+# it is free, and the renderer pairs the newest frame with the latest detection.
+# Stale frames are overwritten, never queued.
+# With a PresenceMonitor attached, the idle state slows capture down to
+# CONFIG.IDLE_FPS and only runs the detector on frames with motion.
+class FramePipeline:
+    def __init__(self, cap, face_detector=None, on_faces=None, presence=None):
+        self.cap = cap
+        self.face_detector = face_detector
+        self.on_faces = on_faces
+        self.presence = presence
+        self.motion = MotionDetector()
+        if presence:
+            presence.add_listener(self._on_presence_change)
+
+        self.running = False
+        self._cond = threading.Condition()
+        self._frame = None
+        self._frame_id = 0
+        self._faces = []
+        self._threads = []
+
+        self.capture_fps = FpsCounter()
+        self.detect_fps = FpsCounter()
+        self.render_fps = FpsCounter()
+        self.dropped = 0
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._threads = [threading.Thread(target=self._capture_loop, daemon=True)]
+        if self.face_detector:
+            self._threads.append(threading.Thread(target=self._detect_loop, daemon=True))
+        for t in self._threads:
+            t.start()
+
+    def stop(self):
+        self.running = False
+        with self._cond:
+            self._cond.notify_all()
+        for t in self._threads:
+            if t is not threading.current_thread():
+                t.join(timeout=1)
+
+    # --- stages ---
+    def _on_presence_change(self, state):
+        if self.presence.idle:
+            self.motion.reset()
+            if self.face_detector:
+                self.face_detector.reset()
+
+    def _capture_loop(self):
+        while self.running:
+            if self.presence and self.presence.idle:
+                time.sleep(1.0 / CONFIG.IDLE_FPS)
+            ret, frame = self.cap.read()
+            if not ret:
+                time.sleep(0.05)
+                continue
+            with self._cond:
+                self._frame = frame
+                self._frame_id += 1
+                self._cond.notify_all()
+            self.capture_fps.tick()
+
+    def _detect_loop(self):
+        last_id = 0
+        while self.running:
+            with self._cond:
+                while self.running and self._frame_id == last_id:
+                    self._cond.wait(timeout=0.5)
+                if not self.running:
+                    break
+                self.dropped += self._frame_id - last_id - 1 if last_id else 0
+                frame, last_id = self._frame, self._frame_id
+
+            motion = False
+            if self.presence and self.presence.idle:
+                motion = self.motion.check(frame)
+                if not motion:
+                    self.presence.update(False)
+                    continue
+
+            faces = self.face_detector.detect(frame)
+            with self._cond:
+                self._faces = list(faces)
+            self.detect_fps.tick()
+
+            if self.presence:
+                self.presence.update(len(faces) > 0, motion)
+
+            if self.on_faces:
+                self.on_faces(faces)
+
+    # --- render side ---
+    def latest(self):
+        with self._cond:
+            return self._frame, self._frame_id, list(self._faces)
+
+    def stats(self):
+        return {
+            "capture": round(self.capture_fps.fps, 1),
+            "detect": round(self.detect_fps.fps, 1),
+            "render": round(self.render_fps.fps, 1),
+            "dropped": self.dropped,
+        }
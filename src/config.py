@@ -2,4 +2,87 @@ class CONFIG:
     CAMERA_INDEX = 0
     FACE_DETECTION_TIMEOUT = 20
     N8N_ENDPOINT = "https://n8n.pinottiautomacoes.online/webhook/audio-to-text"
-    DATA_DIR = "data/sessions"
\ No newline at end of file
+    DATA_DIR = "data/sessions"
+
+    # Open triage sessions (journaled in the DB, restored on startup)
+    SESSION_TTL_SECONDS = 4 * 60 * 60   # idle sessions are evicted after this
+    SESSION_MAX_OPEN = 50
+    SESSION_EVICT_INTERVAL_MS = 60_000
+
+    # Write-behind persistence of session artifacts (triage.json, PDFs)
+    WRITER_QUEUE_SIZE = 256
+    WRITER_BATCH_SIZE = 32
+    WRITER_FSYNC = True
+    PDF_WORKERS = 2               # processes in the PDF render pool
+
+    # Session archive: finished sessions packed into one zip per day, indexed in the DB
+    ARCHIVE_DIR = "data/archive"
+    ARCHIVE_ON_FINISH = False     # pack each session right after it finishes
+
+    # Audio upload: "oneshot" posts the finished WAV, "stream" uploads while recording
+    # (falls back to oneshot if the stream fails)
+    AUDIO_UPLOAD_MODE = "oneshot"
+    N8N_STREAM_ENDPOINT = ""  # e.g. "http://127.0.0.1:8765/stream" with src/stub_server.py
+    # One-shot body: "json" (base64 in JSON), "multipart" (form field "audio") or "binary"
+    # (raw audio body, session in X-Session-Id); multipart/binary are streamed from disk
+    AUDIO_UPLOAD_ENCODING = "json"
+    AUDIO_UPLOAD_GZIP = False     # multipart/binary only
+
+    # HTTP transport
+    HTTP_CONNECT_TIMEOUT = 5
+    HTTP_READ_TIMEOUT = 60
+    HTTP_POOL_SIZE = 4
+    HTTP_RETRIES = 3              # extra attempts on connection errors / 429 / 502-504
+    HTTP_BACKOFF_BASE = 0.5       # seconds, doubled on every attempt
+    HTTP_BACKOFF_MAX = 8
+
+    # Upload outbox (table "outbox" in the app database)
+    OUTBOX_WORKERS = 2            # concurrent uploads across sessions
+    OUTBOX_POLL_SECONDS = 2
+    OUTBOX_BACKOFF_BASE = 5       # seconds before retrying a failed turn, doubled per attempt
+    OUTBOX_BACKOFF_MAX = 300
+    OUTBOX_MAX_ATTEMPTS = 8       # then the turn is marked failed and the session moves on
+
+    # Recording profile: speech-grade 16 kHz int16 mono; "flac" needs the soundfile package
+    AUDIO_SAMPLERATE = 16000
+    AUDIO_DTYPE = "int16"
+    AUDIO_FORMAT = "wav"
+    AUDIO_BUFFER_SECONDS = 120    # capture buffer pool (4 blocks); recordings past one block spill to disk
+    AUDIO_MAX_SECONDS = 1800      # recordings are auto-stopped past this length
+
+    # Voice activity detection (energy + zero-crossing rate per audio block)
+    VAD_ENABLED = True
+    VAD_AUTO_STOP = True
+    VAD_SILENCE_SECONDS = 1.5     # trailing silence that ends the utterance
+    VAD_MIN_SPEECH_SECONDS = 0.4  # ignore clicks/coughs shorter than this
+    VAD_PADDING_SECONDS = 0.3     # kept around the speech when trimming
+    VAD_THRESHOLD_RATIO = 3.0     # speech when block RMS > noise floor * ratio
+    VAD_MIN_RMS = 0.005           # absolute floor for the threshold (full scale = 1.0)
+    VAD_MAX_ZCR = 0.4             # blocks noisier than this are not treated as speech
+    VAD_NOISE_ADAPT = 0.05        # noise floor moving-average rate
+
+    # Face detection
+    FACE_SCALE_FACTOR = 1.3
+    FACE_MIN_NEIGHBORS = 5
+    FACE_DOWNSCALE = 0.5          # full-frame scans run on a frame resized by this ratio
+    FACE_RESCAN_INTERVAL = 10     # frames between full-frame scans while tracking
+    FACE_ROI_MARGIN = 0.5         # ROI grows by this fraction of the last box on each side
+
+    # Detector backend: "haar", "lbp", "dnn" or "yunet" (model files are loaded from disk)
+    FACE_BACKEND = "haar"
+    FACE_LBP_CASCADE = "models/lbpcascade_frontalface_improved.xml"
+    FACE_DNN_PROTO = "models/deploy.prototxt"
+    FACE_DNN_MODEL = "models/res10_300x300_ssd_iter_140000.caffemodel"
+    FACE_YUNET_MODEL = "models/face_detection_yunet_2023mar.onnx"
+    FACE_DNN_CONFIDENCE = 0.6
+
+    # Camera preview (rendered from the Tk main loop, independent of detection rate)
+    PREVIEW_FPS = 20
+    PREVIEW_WIDTH = 640           # initial preview panel size; it then follows the window
+    PREVIEW_HEIGHT = 480
+
+    # Idle mode: after FACE_DETECTION_TIMEOUT without a face, capture slows down and
+    # the face detector only runs on frames with motion
+    IDLE_FPS = 2
+    IDLE_MOTION_THRESHOLD = 6.0   # mean absolute pixel difference (0-255)
+    IDLE_MOTION_STEP = 8          # subsample every Nth pixel for the motion check
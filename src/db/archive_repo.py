@@ -0,0 +1,30 @@
+from typing import Optional, List, Dict, Any
+from .base_repo import BaseRepository
+from .models import ArchiveEntryModel
+from sqlalchemy import select
+
+
+class ArchiveRepository(BaseRepository):
+    def add_many(self, entries: List[Dict[str, Any]]) -> int:
+        self.session.add_all([ArchiveEntryModel(**e) for e in entries])
+        self._commit()
+        return len(entries)
+
+    def get(self, session_id: str, member: str) -> Optional[Dict[str, Any]]:
+        stmt = select(ArchiveEntryModel).where(
+            ArchiveEntryModel.session_id == session_id, ArchiveEntryModel.member == member
+        )
+        return ArchiveEntryModel.to_dict(self.session.execute(stmt).scalars().first())
+
+    def list_session(self, session_id: str) -> List[Dict[str, Any]]:
+        stmt = select(ArchiveEntryModel).where(ArchiveEntryModel.session_id == session_id) \
+            .order_by(ArchiveEntryModel.id)
+        return [r.to_dict() for r in self.session.execute(stmt).scalars().all()]
+
+    def find_by_code(self, code: str) -> List[Dict[str, Any]]:
+        stmt = select(ArchiveEntryModel).where(ArchiveEntryModel.code == code).order_by(ArchiveEntryModel.id)
+        return [r.to_dict() for r in self.session.execute(stmt).scalars().all()]
+
+    def has_session(self, session_id: str) -> bool:
+        stmt = select(ArchiveEntryModel.id).where(ArchiveEntryModel.session_id == session_id).limit(1)
+        return self.session.execute(stmt).first() is not None
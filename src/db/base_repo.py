@@ -0,0 +1,28 @@
+from typing import Optional
+from sqlalchemy.orm import Session
+from .config import get_session
+
+
+class BaseRepository:
+    # Standalone (no session given) a repository owns its session, commits on every
+    # write and must be closed, preferably with `with Repo() as repo:`. Given a
+    # session (see UnitOfWork) writes are only flushed and the owner commits once.
+    def __init__(self, session: Optional[Session] = None):
+        self.session = session or get_session()
+        self._close = session is None
+
+    def _commit(self):
+        if self._close:
+            self.session.commit()
+        else:
+            self.session.flush()
+
+    def close(self):
+        if self._close:
+            self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
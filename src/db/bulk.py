@@ -0,0 +1,21 @@
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List
+
+# rows per executemany; one transaction per chunk keeps memory flat on large imports
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def chunked(rows: Iterable[Dict[str, Any]], size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    it = iter(rows)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def pick(row: Dict[str, Any], columns) -> Dict[str, Any]:
+    # every row carries the same keys (None included) so a chunk is a single executemany;
+    # statements are built on Model.__table__ because ORM bulk inserts split the batch
+    # whenever the set of non-null columns changes between rows
+    return {c: row.get(c) for c in columns}
@@ -7,18 +7,74 @@ load_dotenv()
 
 db_path = os.environ.get("ROBO_DB_PATH", "database.db")
 
-engine = create_engine(
-    f"sqlite:///{db_path}",
-    connect_args={"check_same_thread": False},
-    echo=False,
-    future=True,
-)
-
-@event.listens_for(engine, "connect")
-def _set_sqlite_pragma(conn, _):
-    cursor = conn.cursor()
-    cursor.execute("PRAGMA foreign_keys = ON")
-    cursor.close()
+# Connection profiles, applied as PRAGMAs on every new connection.
+#   throughput: WAL + synchronous=NORMAL; a power loss may drop the last commits but
+#               never corrupts the file. Readers never block the writer.
+#   durable:    WAL + synchronous=FULL; every commit is fsynced.
+# Any value can be overridden with ROBO_DB_<PRAGMA> (e.g. ROBO_DB_SYNCHRONOUS=FULL).
+PROFILES = {
+    "throughput": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64000,       # negative = KiB, so ~64 MB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,       # ms
+    },
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "mmap_size": 64 * 1024 * 1024,
+        "cache_size": -16000,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 10000,
+    },
+}
+
+POOL = {
+    "pool_size": int(os.environ.get("ROBO_DB_POOL_SIZE", 5)),
+    "max_overflow": int(os.environ.get("ROBO_DB_MAX_OVERFLOW", 5)),
+    "pool_timeout": float(os.environ.get("ROBO_DB_POOL_TIMEOUT", 30)),
+    "pool_pre_ping": False,
+}
+
+db_profile = os.environ.get("ROBO_DB_PROFILE", "durable")
+
+
+def profile_pragmas(profile: str):
+    if profile not in PROFILES:
+        raise ValueError(f"Perfil de banco desconhecido: {profile} (opções: {', '.join(PROFILES)})")
+    pragmas = dict(PROFILES[profile])
+    for name in pragmas:
+        override = os.environ.get(f"ROBO_DB_{name.upper()}")
+        if override is not None:
+            pragmas[name] = override
+    return pragmas
+
+
+def make_engine(path: str = db_path, profile: str = db_profile, **pool):
+    pragmas = profile_pragmas(profile)
+    options = {**POOL, **pool}
+    eng = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False, "timeout": int(pragmas["busy_timeout"]) / 1000},
+        echo=False,
+        future=True,
+        **options,
+    )
+
+    @event.listens_for(eng, "connect")
+    def _set_sqlite_pragma(conn, _):
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA foreign_keys = ON")
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+    return eng
+
+
+engine = make_engine()
 
 SessionLocal = sessionmaker(bind=engine, expire_on_commit=False, class_=Session)
 
@@ -0,0 +1,87 @@
+import threading
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from .config import get_session
+from .models import DoctorModel
+from .readers import DOCTORS
+
+# callback(upserted: List[doctor dict], removed: List[doctor id])
+Listener = Callable[[List[Dict[str, Any]], List[int]], None]
+
+
+class DoctorDirectory:
+    # In-process copy of the doctors table. Loaded once on first use, then kept
+    # current write-through by DoctorRepository: every committed create, update or
+    # delete is applied here and published to listeners as a delta, so the UI never
+    # re-queries the table. Listeners may be called from any thread.
+    def __init__(self):
+        self._doctors: Dict[int, Dict[str, Any]] = {}
+        self._loaded = False
+        self._lock = threading.RLock()
+        self._listeners: List[Listener] = []
+
+    def add_listener(self, callback: Listener):
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Listener):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _fetch(self) -> Dict[int, Dict[str, Any]]:
+        with get_session() as session:
+            rows = DOCTORS.dicts(session.execute(DOCTORS.select().order_by(DoctorModel.id)).all())
+        return {d["id"]: d for d in rows}
+
+    def _ensure_loaded(self):
+        with self._lock:
+            if not self._loaded:
+                self._doctors = self._fetch()
+                self._loaded = True
+
+    def all(self) -> List[Dict[str, Any]]:
+        self._ensure_loaded()
+        with self._lock:
+            return [dict(self._doctors[k]) for k in sorted(self._doctors)]
+
+    def get(self, doctor_id: int) -> Optional[Dict[str, Any]]:
+        self._ensure_loaded()
+        with self._lock:
+            doc = self._doctors.get(doctor_id)
+            return dict(doc) if doc else None
+
+    def apply(self, upserted: List[Dict[str, Any]] = (), removed: List[int] = ()):
+        with self._lock:
+            if not self._loaded:
+                return  # the first load will read the committed rows
+            upserted = [dict(d) for d in upserted if self._doctors.get(d["id"]) != d]
+            removed = [i for i in removed if i in self._doctors]
+            for d in upserted:
+                self._doctors[d["id"]] = d
+            for i in removed:
+                del self._doctors[i]
+        self._notify(upserted, removed)
+
+    def reload(self):
+        # after writes that bypass the ORM (bulk APIs): re-read and publish the diff
+        with self._lock:
+            if not self._loaded:
+                return
+            fresh = self._fetch()
+            upserted = [d for i, d in fresh.items() if self._doctors.get(i) != d]
+            removed = [i for i in self._doctors if i not in fresh]
+            self._doctors = fresh
+        self._notify(upserted, removed)
+
+    def after_commit(self, session: Session, fn: Callable[[], None]):
+        # run fn once the session's transaction commits (not at all on rollback)
+        event.listen(session, "after_commit", lambda _s: fn(), once=True)
+
+    def _notify(self, upserted, removed):
+        if not upserted and not removed:
+            return
+        for cb in list(self._listeners):
+            cb(upserted, removed)
+
+
+directory = DoctorDirectory()
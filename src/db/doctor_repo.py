@@ -1,21 +1,58 @@
-from typing import Optional, List, Dict, Any
-from sqlalchemy.orm import Session
-from .config import get_session
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple
+from .base_repo import BaseRepository
 from .models import DoctorModel
-from sqlalchemy import select
+from .bulk import DEFAULT_CHUNK_SIZE, chunked, pick
+from .pagination import Cursor, keyset, next_cursor
+from .doctor_directory import directory
+from .stats_repo import StatsRepository
+from sqlalchemy import select, insert, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
-class DoctorRepository:
-    def __init__(self, session: Optional[Session] = None):
-        self.session = session or get_session()
-        self._close = session is None
+_COLUMNS = ("name", "cpf", "crm")
+
+
+def _upsert_stmt():
+    stmt = sqlite_insert(DoctorModel.__table__)
+    return stmt.on_conflict_do_update(
+        index_elements=["cpf"],
+        set_={"name": stmt.excluded.name, "crm": func.coalesce(stmt.excluded.crm, DoctorModel.crm)},
+    )
+
+
+class DoctorRepository(BaseRepository):
+    def _publish(self, fn):
+        # keep the doctor directory in step with what is actually committed
+        if self._close:
+            fn()
+        else:
+            directory.after_commit(self.session, fn)
 
     def create(self, name: str, cpf: str, crm: Optional[str] = None) -> int:
         doc = DoctorModel(name=name, cpf=cpf, crm=crm)
         self.session.add(doc)
-        self.session.commit()
-        self.session.refresh(doc)
+        self._commit()
+        row = doc.to_dict()
+        self._publish(lambda: directory.apply([row]))
         return doc.id
 
+    def bulk_create(self, rows: Iterable[Dict[str, Any]], chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        total = 0
+        for chunk in chunked(rows, chunk_size):
+            self.session.execute(insert(DoctorModel.__table__), [pick(r, _COLUMNS) for r in chunk])
+            self._commit()
+            total += len(chunk)
+        self._publish(directory.reload)
+        return total
+
+    def bulk_upsert(self, rows: Iterable[Dict[str, Any]], chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        total = 0
+        for chunk in chunked(rows, chunk_size):
+            self.session.execute(_upsert_stmt(), [pick(r, _COLUMNS) for r in chunk])
+            self._commit()
+            total += len(chunk)
+        self._publish(directory.reload)
+        return total
+
     def get(self, doctor_id: int) -> Optional[Dict[str, Any]]:
         return DoctorModel.to_dict(self.session.get(DoctorModel, doctor_id))
 
@@ -24,13 +61,25 @@ class DoctorRepository:
         results = self.session.execute(stmt).scalars().all()
         return [r.to_dict() for r in results]
 
+    def page(self, after: Optional[Cursor] = None, limit: int = 100) -> Tuple[List[Dict[str, Any]], Optional[Cursor]]:
+        keys = (DoctorModel.id,)
+        rows = self.session.execute(keyset(select(DoctorModel), keys, after, limit)).scalars().all()
+        return [r.to_dict() for r in rows], next_cursor(rows, keys, limit)
+
+    def iter_all(self, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        stmt = select(DoctorModel).order_by(DoctorModel.id).execution_options(yield_per=batch_size)
+        for r in self.session.execute(stmt).scalars():
+            yield r.to_dict()
+
     def update(self, doctor_id: int, updates: Dict[str, Any]) -> bool:
         doc = self.session.get(DoctorModel, doctor_id)
         if not doc:
             return False
         for k, v in updates.items():
             setattr(doc, k, v)
-        self.session.commit()
+        self._commit()
+        row = doc.to_dict()
+        self._publish(lambda: directory.apply([row]))
         return True
 
     def delete(self, doctor_id: int) -> bool:
@@ -38,9 +87,7 @@ class DoctorRepository:
         if not doc:
             return False
         self.session.delete(doc)
-        self.session.commit()
+        StatsRepository(self.session).doctor_removed(doctor_id)
+        self._commit()
+        self._publish(lambda: directory.apply(removed=[doctor_id]))
         return True
-
-    def __del__(self):
-        if self._close:
-            self.session.close()
@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Dict, Any, Optional
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Index, UniqueConstraint, func
 from sqlalchemy.orm import declarative_base, relationship
 
 Base = declarative_base()
@@ -19,6 +19,7 @@ class DoctorModel(Base):
 
 class PatientModel(Base):
     __tablename__ = "patients"
+    __table_args__ = (Index("ix_patients_name", "name"),)
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String, nullable=False)
     cpf = Column(String, nullable=False, unique=True)
@@ -31,6 +32,13 @@ class PatientModel(Base):
 
 class TriageModel(Base):
     __tablename__ = "triages"
+    # code lookups (search hits, archive migration) and per-patient / per-doctor
+    # history, newest first (the rowid tie-breaker is implicit)
+    __table_args__ = (
+        Index("ix_triages_code", "code"),
+        Index("ix_triages_patient_created", "patient_id", "created_at"),
+        Index("ix_triages_doctor_created", "main_doctor_id", "created_at"),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     code = Column(String, nullable=False)
     date = Column(String, nullable=True)
@@ -46,6 +54,66 @@ class TriageModel(Base):
         return _model_to_dict(self)
 
 
+class TriageSessionModel(Base):
+    __tablename__ = "triage_sessions"
+    id = Column(String, primary_key=True)
+    status = Column(String, nullable=False, default="open", index=True)  # open | finished | expired | evicted
+    turns = Column(Integer, nullable=False, default=0)
+    last_activity = Column(Float, nullable=False)
+    created_at = Column(DateTime, server_default=func.current_timestamp(), nullable=False)
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return _model_to_dict(self)
+
+
+class OutboxModel(Base):
+    __tablename__ = "outbox"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    session_id = Column(String, nullable=False, index=True)
+    turn = Column(Integer, nullable=False)
+    audio_path = Column(String, nullable=False)
+    doctor_id = Column(Integer, nullable=True)
+    status = Column(String, nullable=False, default="pending", index=True)  # pending | sending | done | failed
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String, nullable=True)
+    next_attempt_at = Column(Float, nullable=False, default=0.0)
+    created_at = Column(DateTime, server_default=func.current_timestamp(), nullable=False)
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return _model_to_dict(self)
+
+
+class ArchiveEntryModel(Base):
+    __tablename__ = "archive_entries"
+    __table_args__ = (UniqueConstraint("session_id", "member", name="uq_archive_session_member"),)
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    session_id = Column(String, nullable=False, index=True)
+    code = Column(String, nullable=True, index=True)
+    container = Column(String, nullable=False)
+    member = Column(String, nullable=False)
+    offset = Column(Integer, nullable=False)  # start of the stored (uncompressed) bytes
+    size = Column(Integer, nullable=False)
+    created_at = Column(DateTime, server_default=func.current_timestamp(), nullable=False)
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return _model_to_dict(self)
+
+
+class TriageStatsModel(Base):
+    # Dashboard summaries maintained incrementally by StatsRepository: one row per
+    # (UTC day, doctor, status). doctor_id 0 means no doctor, since a NULL in the key
+    # would defeat ON CONFLICT. `turns` is a sum; the average is turns / count.
+    __tablename__ = "triage_stats"
+    day = Column(String, primary_key=True)
+    doctor_id = Column(Integer, primary_key=True, default=0)
+    status = Column(String, primary_key=True)  # finished | expired
+    count = Column(Integer, nullable=False, default=0)
+    turns = Column(Integer, nullable=False, default=0)
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return _model_to_dict(self)
+
+
 def _to_serializable(val):
     if isinstance(val, datetime):
         return val.isoformat()
@@ -59,3 +127,11 @@ def _model_to_dict(model) -> Optional[Dict[str, Any]]:
     for col in model.__table__.columns:
         result[col.name] = _to_serializable(getattr(model, col.name))
     return result
+
+
+def ensure_indexes(bind) -> None:
+    # create_all only indexes tables it creates; this adds indexes declared later
+    # to databases that already have the tables
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind, checkfirst=True)
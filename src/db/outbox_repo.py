@@ -0,0 +1,101 @@
+import time
+from typing import Optional, List, Dict, Any, Iterable
+from .base_repo import BaseRepository
+from .models import OutboxModel
+from sqlalchemy import select, update, func
+
+
+class OutboxRepository(BaseRepository):
+    def enqueue(self, session_id: str, turn: int, audio_path: str, doctor_id: Optional[int] = None) -> int:
+        item = OutboxModel(session_id=session_id, turn=turn, audio_path=audio_path,
+                           doctor_id=doctor_id, status="pending", attempts=0, next_attempt_at=0.0)
+        self.session.add(item)
+        self._commit()
+        return item.id
+
+    def get(self, item_id: int) -> Optional[Dict[str, Any]]:
+        return OutboxModel.to_dict(self.session.get(OutboxModel, item_id))
+
+    def claim_next(self, exclude_sessions: Iterable[str] = ()) -> Optional[Dict[str, Any]]:
+        # Oldest due item that is also the head of its session's queue, so turns of
+        # one session are always sent in order. Callers serialize claims.
+        heads = (
+            select(func.min(OutboxModel.id))
+            .where(OutboxModel.status.in_(("pending", "sending")))
+            .group_by(OutboxModel.session_id)
+        )
+        stmt = (
+            select(OutboxModel)
+            .where(OutboxModel.id.in_(heads))
+            .where(OutboxModel.status == "pending")
+            .where(OutboxModel.next_attempt_at <= time.time())
+            .order_by(OutboxModel.id)
+        )
+        exclude = list(exclude_sessions)
+        if exclude:
+            stmt = stmt.where(OutboxModel.session_id.not_in(exclude))
+
+        item = self.session.execute(stmt.limit(1)).scalars().first()
+        if item is None:
+            return None
+        item.status = "sending"
+        item.attempts += 1
+        self._commit()
+        return item.to_dict()
+
+    def mark_done(self, item_id: int) -> bool:
+        item = self.session.get(OutboxModel, item_id)
+        if not item:
+            return False
+        item.status = "done"
+        item.last_error = None
+        self._commit()
+        return True
+
+    def mark_retry(self, item_id: int, error: str, delay: float) -> bool:
+        item = self.session.get(OutboxModel, item_id)
+        if not item:
+            return False
+        item.status = "pending"
+        item.last_error = error[:500]
+        item.next_attempt_at = time.time() + delay
+        self._commit()
+        return True
+
+    def mark_failed(self, item_id: int, error: str) -> bool:
+        # terminal: no further attempts; later turns of the session are unblocked
+        item = self.session.get(OutboxModel, item_id)
+        if not item:
+            return False
+        item.status = "failed"
+        item.last_error = error[:500]
+        self._commit()
+        return True
+
+    def failed_count(self, session_id: Optional[str] = None) -> int:
+        stmt = select(func.count(OutboxModel.id)).where(OutboxModel.status == "failed")
+        if session_id:
+            stmt = stmt.where(OutboxModel.session_id == session_id)
+        return self.session.execute(stmt).scalar_one()
+
+    def recover(self) -> int:
+        # items left "sending" by a crash go back to the queue
+        result = self.session.execute(
+            update(OutboxModel).where(OutboxModel.status == "sending").values(status="pending")
+        )
+        self._commit()
+        return result.rowcount
+
+    def pending_count(self, session_id: Optional[str] = None) -> int:
+        stmt = select(func.count(OutboxModel.id)).where(OutboxModel.status.in_(("pending", "sending")))
+        if session_id:
+            stmt = stmt.where(OutboxModel.session_id == session_id)
+        return self.session.execute(stmt).scalar_one()
+
+    def list(self, status: Optional[str] = None, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        stmt = select(OutboxModel)
+        if status:
+            stmt = stmt.where(OutboxModel.status == status)
+        stmt = stmt.order_by(OutboxModel.id).limit(limit).offset(offset)
+        results = self.session.execute(stmt).scalars().all()
+        return [r.to_dict() for r in results]
@@ -0,0 +1,26 @@
+from typing import Any, Optional, Sequence, Tuple
+from sqlalchemy import tuple_
+
+# A cursor is the sort key of the last row of a page, e.g. (created_at, id).
+# Callers pass it back unchanged as `after` to get the next page.
+Cursor = Tuple[Any, ...]
+
+
+def keyset(stmt, columns: Sequence, after: Optional[Cursor], limit: int, descending: bool = False):
+    # WHERE (k1, k2) > (:a, :b) ORDER BY k1, k2 LIMIT n. With an index on the key
+    # columns every page is a short index range scan, however deep it is, unlike
+    # OFFSET, which walks and discards every skipped row.
+    if after is not None:
+        key, bound = tuple_(*columns), tuple_(*after)
+        stmt = stmt.where(key < bound if descending else key > bound)
+    order = [c.desc() if descending else c.asc() for c in columns]
+    return stmt.order_by(*order).limit(limit)
+
+
+def next_cursor(rows, columns: Sequence, limit: int) -> Optional[Cursor]:
+    # None once the last page has been returned. Only for keys whose values bind back
+    # exactly as stored; DateTime keys need the stored text (see TriageRepository.page)
+    if len(rows) < limit:
+        return None
+    last = rows[-1]
+    return tuple(getattr(last, c.key) for c in columns)
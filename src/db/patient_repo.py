@@ -1,21 +1,70 @@
-from typing import Optional, List, Dict, Any
-from sqlalchemy.orm import Session
-from .config import get_session
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple
+from .base_repo import BaseRepository
 from .models import PatientModel
-from sqlalchemy import select
+from .bulk import DEFAULT_CHUNK_SIZE, chunked, pick
+from .pagination import Cursor, keyset, next_cursor
+from .stats_repo import StatsRepository
+from .triage_search import unindex_triages
+from sqlalchemy import select, insert, func, case, or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
-class PatientRepository:
-    def __init__(self, session: Optional[Session] = None):
-        self.session = session or get_session()
-        self._close = session is None
+_COLUMNS = ("name", "cpf", "date_of_birth")
 
+# stored when the agent could not get the patient's name
+UNKNOWN_NAME = "Desconhecido"
+
+
+def _upsert_stmt():
+    # on a CPF that already exists, refresh the name unless the new one is empty or
+    # the placeholder, and keep a known birth date
+    stmt = sqlite_insert(PatientModel.__table__)
+    return stmt.on_conflict_do_update(
+        index_elements=["cpf"],
+        set_={
+            "name": case(
+                (or_(func.coalesce(stmt.excluded.name, "") == "", stmt.excluded.name == UNKNOWN_NAME),
+                 PatientModel.name),
+                else_=stmt.excluded.name,
+            ),
+            "date_of_birth": func.coalesce(stmt.excluded.date_of_birth, PatientModel.date_of_birth),
+        },
+    )
+
+
+class PatientRepository(BaseRepository):
     def create(self, name: str, cpf: str, date_of_birth: Optional[str] = None) -> int:
         p = PatientModel(name=name, cpf=cpf, date_of_birth=date_of_birth)
         self.session.add(p)
-        self.session.commit()
-        self.session.refresh(p)
+        self._commit()
         return p.id
 
+    def upsert_by_cpf(self, name: str, cpf: str, date_of_birth: Optional[str] = None) -> int:
+        stmt = _upsert_stmt().values(name=name, cpf=cpf, date_of_birth=date_of_birth) \
+            .returning(PatientModel.id)
+        patient_id = self.session.execute(stmt).scalar_one()
+        self._commit()
+        return patient_id
+
+    def bulk_create(self, rows: Iterable[Dict[str, Any]], chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        total = 0
+        for chunk in chunked(rows, chunk_size):
+            self.session.execute(insert(PatientModel.__table__), [pick(r, _COLUMNS) for r in chunk])
+            self._commit()
+            total += len(chunk)
+        return total
+
+    def bulk_upsert(self, rows: Iterable[Dict[str, Any]], chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        total = 0
+        for chunk in chunked(rows, chunk_size):
+            self.session.execute(_upsert_stmt(), [pick(r, _COLUMNS) for r in chunk])
+            self._commit()
+            total += len(chunk)
+        return total
+
+    def get_by_cpf(self, cpf: str) -> Optional[Dict[str, Any]]:
+        stmt = select(PatientModel).where(PatientModel.cpf == cpf)
+        return PatientModel.to_dict(self.session.execute(stmt).scalars().first())
+
     def get(self, patient_id: int) -> Optional[Dict[str, Any]]:
         p = self.session.get(PatientModel, patient_id)
         return p.to_dict() if p else None
@@ -25,23 +74,33 @@ class PatientRepository:
         results = self.session.execute(stmt).scalars().all()
         return [r.to_dict() for r in results]
 
+    def page(self, after: Optional[Cursor] = None, limit: int = 100) -> Tuple[List[Dict[str, Any]], Optional[Cursor]]:
+        # alphabetical; served by ix_patients_name
+        keys = (PatientModel.name, PatientModel.id)
+        rows = self.session.execute(keyset(select(PatientModel), keys, after, limit)).scalars().all()
+        return [r.to_dict() for r in rows], next_cursor(rows, keys, limit)
+
+    def iter_all(self, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        stmt = select(PatientModel).order_by(PatientModel.id).execution_options(yield_per=batch_size)
+        for r in self.session.execute(stmt).scalars():
+            yield r.to_dict()
+
     def update(self, patient_id: int, updates: Dict[str, Any]) -> bool:
         p = self.session.get(PatientModel, patient_id)
         if not p:
             return False
         for k, v in updates.items():
             setattr(p, k, v)
-        self.session.commit()
+        self._commit()
         return True
 
     def delete(self, patient_id: int) -> bool:
         p = self.session.get(PatientModel, patient_id)
         if not p:
             return False
+        StatsRepository(self.session).patient_removed(patient_id)
+        # the patient's triages go with it (ON DELETE CASCADE), so do their search rows
+        unindex_triages(self.session.connection(), "patient_id = :id", {"id": patient_id})
         self.session.delete(p)
-        self.session.commit()
+        self._commit()
         return True
-
-    def __del__(self):
-        if self._close:
-            self.session.close()
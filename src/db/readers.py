@@ -0,0 +1,133 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import DateTime, String, select, type_coerce
+from .base_repo import BaseRepository
+from .models import DoctorModel, PatientModel, TriageModel
+from .pagination import Cursor, keyset
+
+# Read-only listings on Core selects. No ORM entities are built and nothing enters
+# the identity map. Rows come back as plain tuples, __slots__ records or dicts with
+# the same keys and values as Model.to_dict().
+
+
+class Record:
+    __slots__ = ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    def __repr__(self):
+        fields = ", ".join(f"{k}={getattr(self, k)!r}" for k in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+def _record_class(name: str, keys: Sequence[str]):
+    def __init__(self, *values):
+        for k, v in zip(keys, values):
+            setattr(self, k, v)
+    return type(name, (Record,), {"__slots__": tuple(keys), "__init__": __init__})
+
+
+def _iso(raw: Optional[str]) -> Optional[str]:
+    # SQLite stores "YYYY-MM-DD HH:MM:SS[.ffffff]"; this is datetime.isoformat() of
+    # the same value without parsing it (isoformat drops an all-zero fraction)
+    if raw is None:
+        return None
+    if raw.endswith(".000000"):
+        raw = raw[:-7]
+    return f"{raw[:10]}T{raw[11:]}"
+
+
+class Projection:
+    # Column list compiled once: the select expressions, the output keys, the
+    # datetime columns and a matching __slots__ record class. Datetime columns are
+    # read as their stored text, so there is no per-row datetime construction, and
+    # they are converted column-wise after the fetch.
+    def __init__(self, model, columns: Optional[Sequence[str]] = None):
+        table = model.__table__
+        cols = [table.c[n] for n in columns] if columns else list(table.c)
+        self.keys = tuple(c.key for c in cols)
+        self.datetimes = tuple(i for i, c in enumerate(cols) if isinstance(c.type, DateTime))
+        self.exprs = [type_coerce(c, String).label(c.key) if i in self.datetimes else c
+                      for i, c in enumerate(cols)]
+        self.record = _record_class(f"{model.__name__.replace('Model', '')}Record", self.keys)
+
+    def index(self, key: str) -> int:
+        return self.keys.index(key)
+
+    def select(self):
+        return select(*self.exprs)
+
+    def tuples(self, rows: Iterable[Tuple]) -> List[Tuple]:
+        rows = rows if isinstance(rows, list) else list(rows)
+        if not rows or not self.datetimes:
+            return [tuple(r) for r in rows]
+        columns = list(zip(*rows))
+        for i in self.datetimes:
+            columns[i] = list(map(_iso, columns[i]))
+        return list(zip(*columns))
+
+    def records(self, rows) -> List[Record]:
+        make = self.record
+        return [make(*r) for r in self.tuples(rows)]
+
+    def dicts(self, rows) -> List[Dict[str, Any]]:
+        keys = self.keys
+        return [dict(zip(keys, r)) for r in self.tuples(rows)]
+
+    def shape(self, rows, shape: str):
+        if shape == "tuple":
+            return self.tuples(rows)
+        if shape == "record":
+            return self.records(rows)
+        return self.dicts(rows)
+
+
+TRIAGES = Projection(TriageModel)
+PATIENTS = Projection(PatientModel)
+DOCTORS = Projection(DoctorModel)
+
+
+class TriageReader(BaseRepository):
+    def list(self, limit: int = 100, offset: int = 0,
+             patient_id: Optional[int] = None, doctor_id: Optional[int] = None,
+             projection: Projection = TRIAGES, shape: str = "dict") -> list:
+        stmt = self._filtered(projection.select(), patient_id, doctor_id)
+        stmt = stmt.order_by(TriageModel.id).limit(limit).offset(offset)
+        return projection.shape(self.session.execute(stmt).all(), shape)
+
+    def page(self, after: Optional[Cursor] = None, limit: int = 100,
+             patient_id: Optional[int] = None, doctor_id: Optional[int] = None,
+             projection: Projection = TRIAGES, shape: str = "dict"):
+        # same order and index as TriageRepository.page; the projection must include
+        # id and created_at, and the cursor (stored created_at text, id) is only
+        # valid for TriageReader.page
+        keys = (type_coerce(TriageModel.created_at, String), TriageModel.id)
+        stmt = self._filtered(projection.select(), patient_id, doctor_id)
+        rows = self.session.execute(keyset(stmt, keys, after, limit, descending=True)).all()
+        cursor = None
+        if len(rows) == limit:
+            last = rows[-1]
+            cursor = (last[projection.index("created_at")], last[projection.index("id")])
+        return projection.shape(rows, shape), cursor
+
+    @staticmethod
+    def _filtered(stmt, patient_id, doctor_id):
+        if patient_id:
+            stmt = stmt.where(TriageModel.patient_id == patient_id)
+        if doctor_id:
+            stmt = stmt.where(TriageModel.main_doctor_id == doctor_id)
+        return stmt
+
+
+class PatientReader(BaseRepository):
+    def list(self, limit: int = 100, offset: int = 0,
+             projection: Projection = PATIENTS, shape: str = "dict") -> list:
+        stmt = projection.select().order_by(PatientModel.id).limit(limit).offset(offset)
+        return projection.shape(self.session.execute(stmt).all(), shape)
+
+
+class DoctorReader(BaseRepository):
+    def list(self, limit: int = 100, offset: int = 0,
+             projection: Projection = DOCTORS, shape: str = "dict") -> list:
+        stmt = projection.select().order_by(DoctorModel.id).limit(limit).offset(offset)
+        return projection.shape(self.session.execute(stmt).all(), shape)
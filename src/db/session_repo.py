@@ -0,0 +1,48 @@
+import time
+from typing import Optional, List, Dict, Any, Iterable
+from .base_repo import BaseRepository
+from .models import TriageSessionModel
+from .stats_repo import StatsRepository
+from sqlalchemy import select, update
+
+
+class SessionRepository(BaseRepository):
+    def upsert_open(self, session_id: str, turns: int = 0) -> None:
+        row = self.session.get(TriageSessionModel, session_id)
+        if row is None:
+            row = TriageSessionModel(id=session_id, status="open", turns=turns, last_activity=time.time())
+            self.session.add(row)
+        else:
+            if row.status == "expired":
+                StatsRepository(self.session).sessions_reopening([session_id])
+            row.status = "open"
+            row.turns = max(row.turns, turns)
+            row.last_activity = time.time()
+        self._commit()
+
+    def touch(self, session_id: str, turns: Optional[int] = None) -> bool:
+        values = {"last_activity": time.time()}
+        if turns is not None:
+            values["turns"] = turns
+        result = self.session.execute(
+            update(TriageSessionModel).where(TriageSessionModel.id == session_id).values(**values)
+        )
+        self._commit()
+        return result.rowcount > 0
+
+    def set_status(self, session_ids: Iterable[str], status: str) -> int:
+        ids = list(session_ids)
+        if not ids:
+            return 0
+        if status == "expired":
+            StatsRepository(self.session).sessions_expiring(ids)
+        result = self.session.execute(
+            update(TriageSessionModel).where(TriageSessionModel.id.in_(ids)).values(status=status)
+        )
+        self._commit()
+        return result.rowcount
+
+    def list_open(self) -> List[Dict[str, Any]]:
+        stmt = select(TriageSessionModel).where(TriageSessionModel.status == "open") \
+            .order_by(TriageSessionModel.created_at, TriageSessionModel.last_activity)
+        return [r.to_dict() for r in self.session.execute(stmt).scalars().all()]
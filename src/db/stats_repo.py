@@ -0,0 +1,134 @@
+from typing import Optional, List, Dict, Any, Iterable
+from sqlalchemy import text
+from .base_repo import BaseRepository
+
+# Every writer below runs in the caller's session, so the summary change commits or
+# rolls back together with the triage rows it describes.
+
+_UPSERT = (
+    "ON CONFLICT(day, doctor_id, status) DO UPDATE SET "
+    "count = triage_stats.count + excluded.count, turns = triage_stats.turns + excluded.turns"
+)
+
+# finished triages; the turn count comes from the session journal
+_FINISHED = (
+    "SELECT date(t.created_at) AS day, coalesce(t.main_doctor_id, 0) AS doctor_id, 'finished', "
+    "{sign} * count(*), {sign} * coalesce(sum(s.turns), 0) "
+    "FROM triages t LEFT JOIN triage_sessions s ON s.id = t.code "
+    "WHERE {where} GROUP BY 1, 2"
+)
+
+# sessions that expired without being finished (no doctor is known for them)
+_EXPIRED = (
+    "SELECT date(last_activity, 'unixepoch') AS day, 0, 'expired', "
+    "{sign} * count(*), {sign} * coalesce(sum(turns), 0) "
+    "FROM triage_sessions WHERE {where} GROUP BY 1"
+)
+
+_INSERT = "INSERT INTO triage_stats (day, doctor_id, status, count, turns) "
+
+
+class StatsRepository(BaseRepository):
+    def _apply_finished(self, where: str, params: Dict[str, Any], sign: int):
+        sql = _INSERT + _FINISHED.format(sign=sign, where=where) + " " + _UPSERT
+        self.session.execute(text(sql), params)
+        if sign < 0:
+            self.session.execute(text("DELETE FROM triage_stats WHERE count <= 0"))
+
+    def triage_added(self, triage_id: int):
+        self._apply_finished("t.id = :id", {"id": triage_id}, 1)
+
+    def triage_removed(self, triage_id: int):
+        # call before the row is deleted
+        self._apply_finished("t.id = :id", {"id": triage_id}, -1)
+
+    def triages_added_after(self, last_id: int):
+        # rows bulk-inserted in this transaction (ids are assigned increasingly)
+        self._apply_finished("t.id > :id", {"id": last_id}, 1)
+
+    def _apply_expired(self, session_ids: Iterable[str], where: str, sign: int):
+        ids = list(session_ids)
+        if not ids:
+            return
+        marks = ", ".join(f":s{i}" for i in range(len(ids)))
+        sql = _INSERT + _EXPIRED.format(sign=sign, where=f"{where} AND id IN ({marks})") + " " + _UPSERT
+        self.session.execute(text(sql), {f"s{i}": sid for i, sid in enumerate(ids)})
+        if sign < 0:
+            self.session.execute(text("DELETE FROM triage_stats WHERE count <= 0"))
+
+    def sessions_expiring(self, session_ids: Iterable[str]):
+        # call before the status changes, so a session is counted once per expiry
+        self._apply_expired(session_ids, "status != 'expired'", 1)
+
+    def sessions_reopening(self, session_ids: Iterable[str]):
+        # call before an expired session is reopened: it no longer counts as expired
+        self._apply_expired(session_ids, "status = 'expired'", -1)
+
+    def patient_removed(self, patient_id: int):
+        # call before the delete: the patient's triages go with it (ON DELETE CASCADE)
+        self._apply_finished("t.patient_id = :id", {"id": patient_id}, -1)
+
+    def doctor_removed(self, doctor_id: int):
+        # triages.main_doctor_id is SET NULL by the foreign key; move the counts to 0
+        self.session.execute(text(
+            _INSERT + "SELECT day, 0, status, count, turns FROM triage_stats WHERE doctor_id = :d " + _UPSERT
+        ), {"d": doctor_id})
+        self.session.execute(text("DELETE FROM triage_stats WHERE doctor_id = :d"), {"d": doctor_id})
+
+    def rebuild(self) -> int:
+        # full recompute from triages (of existing patients) and the session journal
+        self.session.execute(text("DELETE FROM triage_stats"))
+        finished = _FINISHED.format(sign=1, where="t.patient_id IN (SELECT id FROM patients)")
+        self.session.execute(text(_INSERT + finished + " " + _UPSERT))
+        expired = _EXPIRED.format(sign=1, where="status = 'expired'")
+        self.session.execute(text(_INSERT + expired + " " + _UPSERT))
+        self._commit()
+        return self.session.execute(text("SELECT count(*) FROM triage_stats")).scalar_one()
+
+    # --- reads: O(summary rows in range), independent of the size of triages ---
+
+    def _summary(self, group_by: List[str], start: Optional[str], end: Optional[str],
+                 doctor_id: Optional[int], status: Optional[str]) -> List[Dict[str, Any]]:
+        where, params = [], {}
+        if start:
+            where.append("day >= :start")
+            params["start"] = start
+        if end:
+            where.append("day <= :end")
+            params["end"] = end
+        if doctor_id is not None:
+            where.append("doctor_id = :doctor_id")
+            params["doctor_id"] = doctor_id
+        if status:
+            where.append("status = :status")
+            params["status"] = status
+        cols = ", ".join(group_by)
+        sql = f"SELECT {cols + ', ' if cols else ''}sum(count) AS count, sum(turns) AS turns FROM triage_stats"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if cols:
+            sql += f" GROUP BY {cols} ORDER BY {cols}"
+        result = []
+        for r in self.session.execute(text(sql), params).mappings():
+            row = dict(r)
+            row["count"] = row["count"] or 0
+            row["turns"] = row["turns"] or 0
+            row["avg_turns"] = row["turns"] / row["count"] if row["count"] else 0.0
+            result.append(row)
+        return result
+
+    def by_day(self, start: Optional[str] = None, end: Optional[str] = None,
+               doctor_id: Optional[int] = None, status: Optional[str] = "finished") -> List[Dict[str, Any]]:
+        return self._summary(["day"], start, end, doctor_id, status)
+
+    def by_doctor(self, start: Optional[str] = None, end: Optional[str] = None,
+                  status: Optional[str] = "finished") -> List[Dict[str, Any]]:
+        return self._summary(["doctor_id"], start, end, None, status)
+
+    def by_status(self, start: Optional[str] = None, end: Optional[str] = None,
+                  doctor_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        return self._summary(["status"], start, end, doctor_id, None)
+
+    def totals(self, start: Optional[str] = None, end: Optional[str] = None,
+               doctor_id: Optional[int] = None, status: Optional[str] = "finished") -> Dict[str, Any]:
+        return self._summary([], start, end, doctor_id, status)[0]
@@ -1,23 +1,44 @@
-from typing import Optional, List, Dict, Any
-from sqlalchemy.orm import Session
-from .config import get_session
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple
+from .base_repo import BaseRepository
 from .models import TriageModel, DoctorModel, PatientModel
-from sqlalchemy import select
+from .bulk import DEFAULT_CHUNK_SIZE, chunked, pick
+from .pagination import Cursor, keyset
+from .stats_repo import StatsRepository
+from .triage_search import TABLE as SEARCH_TABLE, document, index_documents, match_query, \
+    unindex_triages
+from sqlalchemy import String, select, update, insert, text, func, type_coerce
 
-class TriageRepository:
-    def __init__(self, session: Optional[Session] = None):
-        self.session = session or get_session()
-        self._close = session is None
+_COLUMNS = ("code", "date", "path", "patient_id", "main_doctor_id")
 
+
+class TriageRepository(BaseRepository):
     def create(self, code: str, date: Optional[str], path: Optional[str],
-               patient_id: int, main_doctor_id: Optional[int] = None) -> int:
+               patient_id: int, main_doctor_id: Optional[int] = None,
+               record: Optional[Dict[str, Any]] = None) -> int:
+        # record: the finished triage.json contents, indexed for full-text search in
+        # the same transaction as the row and its stats
         t = TriageModel(code=code, date=date, path=path,
                         patient_id=patient_id, main_doctor_id=main_doctor_id)
         self.session.add(t)
-        self.session.commit()
-        self.session.refresh(t)
+        self.session.flush()
+        StatsRepository(self.session).triage_added(t.id)
+        if record is not None:
+            index_documents([document(code, record)], self.session.connection())
+        self._commit()
         return t.id
 
+    def bulk_create(self, rows: Iterable[Dict[str, Any]], chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        # triage codes are not unique, so there is no natural key to upsert on
+        total = 0
+        stats = StatsRepository(self.session)
+        for chunk in chunked(rows, chunk_size):
+            last_id = self.session.execute(select(func.coalesce(func.max(TriageModel.id), 0))).scalar_one()
+            self.session.execute(insert(TriageModel.__table__), [pick(r, _COLUMNS) for r in chunk])
+            stats.triages_added_after(last_id)
+            self._commit()
+            total += len(chunk)
+        return total
+
     def get(self, triage_id: int) -> Optional[Dict[str, Any]]:
         t = self.session.get(TriageModel, triage_id)
         return t.to_dict() if t else None
@@ -35,23 +56,96 @@ class TriageRepository:
         results = self.session.execute(stmt).scalars().all()
         return [r.to_dict() for r in results]
 
+    def page(self, after: Optional[Cursor] = None, limit: int = 100,
+             patient_id: Optional[int] = None,
+             doctor_id: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[Cursor]]:
+        # newest first; served by ix_triages_patient_created / ix_triages_doctor_created.
+        # Keyed on the stored created_at text (as TriageReader.page): a bound datetime
+        # renders with microseconds and would sort after every row of its own second.
+        created = type_coerce(TriageModel.created_at, String)
+        stmt = select(TriageModel, created.label("created_key"))
+        if patient_id:
+            stmt = stmt.where(TriageModel.patient_id == patient_id)
+        if doctor_id:
+            stmt = stmt.where(TriageModel.main_doctor_id == doctor_id)
+        keys = (created, TriageModel.id)
+        rows = self.session.execute(keyset(stmt, keys, after, limit, descending=True)).all()
+        cursor = (rows[-1][1], rows[-1][0].id) if len(rows) == limit else None
+        return [r.to_dict() for r, _ in rows], cursor
+
+    def iter_all(self, batch_size: int = 1000, patient_id: Optional[int] = None,
+                 doctor_id: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        # streams rows for exports without loading the table into memory
+        stmt = select(TriageModel)
+        if patient_id:
+            stmt = stmt.where(TriageModel.patient_id == patient_id)
+        if doctor_id:
+            stmt = stmt.where(TriageModel.main_doctor_id == doctor_id)
+        stmt = stmt.order_by(TriageModel.id).execution_options(yield_per=batch_size)
+        for r in self.session.execute(stmt).scalars():
+            yield r.to_dict()
+
+    def search(self, query: str, doctor_id: Optional[int] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        # ranked full-text hits (bm25; summary weighs most) with a highlighted snippet;
+        # sessions indexed from disk without a triage row (rebuild_search_index.py)
+        # come back with id None
+        match = match_query(query)
+        if match is None:
+            return []
+        # rank and cut to `limit` inside the FTS query, then join the few hits to
+        # triages; with a doctor filter the join has to happen before the cut
+        params = {"match": match, "limit": limit}
+        hits = (
+            f"SELECT {SEARCH_TABLE}.session_id, snippet({SEARCH_TABLE}, -1, '[', ']', '…', 12) AS snippet, "
+            f"bm25({SEARCH_TABLE}, 0, 3.0, 2.0, 1.0) AS rank "
+            f"FROM {SEARCH_TABLE}"
+        )
+        if doctor_id:
+            hits += f" JOIN triages d ON d.code = {SEARCH_TABLE}.session_id AND d.main_doctor_id = :doctor_id"
+            params["doctor_id"] = doctor_id
+        hits += f" WHERE {SEARCH_TABLE} MATCH :match ORDER BY rank LIMIT :limit"
+        sql = (
+            "SELECT h.session_id, t.id, t.patient_id, t.main_doctor_id, t.date, t.path, h.snippet, h.rank "
+            f"FROM ({hits}) h LEFT JOIN triages t ON t.code = h.session_id"
+        )
+        if doctor_id:
+            sql += " AND t.main_doctor_id = :doctor_id"
+        sql += " ORDER BY h.rank"
+        rows = self.session.execute(text(sql), params).all()
+        return [
+            {"code": r.session_id, "id": r.id, "patient_id": r.patient_id, "main_doctor_id": r.main_doctor_id,
+             "date": r.date, "path": r.path, "snippet": r.snippet, "rank": r.rank}
+            for r in rows
+        ]
+
     def update(self, triage_id: int, updates: Dict[str, Any]) -> bool:
         t = self.session.get(TriageModel, triage_id)
         if not t:
             return False
+        # moving a triage to another doctor or day moves it in the summaries too
+        regroup = bool({"main_doctor_id", "created_at", "code"} & set(updates))
+        stats = StatsRepository(self.session)
+        if regroup:
+            stats.triage_removed(triage_id)
         for k, v in updates.items():
             setattr(t, k, v)
-        self.session.commit()
+        if regroup:
+            self.session.flush()
+            stats.triage_added(triage_id)
+        self._commit()
         return True
 
+    def update_path_by_code(self, code: str, path: str) -> int:
+        result = self.session.execute(update(TriageModel).where(TriageModel.code == code).values(path=path))
+        self._commit()
+        return result.rowcount
+
     def delete(self, triage_id: int) -> bool:
         t = self.session.get(TriageModel, triage_id)
         if not t:
             return False
+        StatsRepository(self.session).triage_removed(triage_id)
+        unindex_triages(self.session.connection(), "id = :id", {"id": triage_id})
         self.session.delete(t)
-        self.session.commit()
+        self._commit()
         return True
-
-    def __del__(self):
-        if self._close:
-            self.session.close()
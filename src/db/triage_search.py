@@ -0,0 +1,88 @@
+import re
+from typing import Any, Dict, Iterable, Optional
+from sqlalchemy import text
+from .config import engine
+
+# FTS5 index over the clinical content of finished triages, one row per session:
+# the AI summary, the patient data and the AI message. Accents are folded
+# (remove_diacritics), so "cabeca" finds "cabeça". The table lives in the main
+# database and is keyed by the triage code (= session id).
+TABLE = "triage_search"
+COLUMNS = ("summary", "patient", "message")
+
+_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+    "session_id UNINDEXED, summary, patient, message, "
+    "tokenize = 'unicode61 remove_diacritics 2')"
+)
+
+def ensure_search_table(bind=None) -> None:
+    # run once at startup (main.py), before anything indexes or searches
+    with (bind or engine).begin() as conn:
+        conn.execute(text(_DDL))
+
+
+def document(session_id: str, data: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    # the searchable fields of a triage.json; None unless the triage is finished
+    if not isinstance(data, dict) or data.get("status") != "finished":
+        return None
+    record = data.get("record") or {}
+    patient = record.get("patient") or {}
+    return {
+        "session_id": session_id,
+        "summary": record.get("summary") or "",
+        "patient": " ".join(str(patient[k]) for k in ("name", "cpf", "date_of_birth") if patient.get(k)),
+        "message": data.get("message") or "",
+    }
+
+
+def index_documents(docs: Iterable[Dict[str, str]], conn=None) -> int:
+    # replaces any previous row for the same session; pass `conn` to index inside
+    # the caller's transaction
+    docs = [d for d in docs if d]
+    if not docs:
+        return 0
+    if conn is None:
+        with engine.begin() as conn:
+            return index_documents(docs, conn)
+    conn.execute(text(f"DELETE FROM {TABLE} WHERE session_id = :session_id"),
+                 [{"session_id": d["session_id"]} for d in docs])
+    conn.execute(text(f"INSERT INTO {TABLE} (session_id, summary, patient, message) "
+                      "VALUES (:session_id, :summary, :patient, :message)"), docs)
+    return len(docs)
+
+
+def unindex_triages(conn, where: str, params: Dict[str, Any]) -> None:
+    # call before deleting the triages matching `where`; a code still used by a
+    # triage that stays keeps its row
+    conn.execute(text(
+        f"DELETE FROM {TABLE} WHERE session_id IN (SELECT code FROM triages WHERE {where}) "
+        f"AND session_id NOT IN (SELECT code FROM triages WHERE NOT ({where}))"
+    ), params)
+
+
+def index_triage(session_id: str, data: Dict[str, Any]) -> bool:
+    return index_documents([document(session_id, data)]) > 0
+
+
+def reset_search_table(bind=None) -> None:
+    with (bind or engine).begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+        conn.execute(text(_DDL))
+
+
+def optimize(bind=None) -> None:
+    # merge the index b-trees after a large rebuild
+    with (bind or engine).begin() as conn:
+        conn.execute(text(f"INSERT INTO {TABLE}({TABLE}) VALUES ('optimize')"))
+
+
+def match_query(query: str) -> Optional[str]:
+    # free text -> FTS5 query: every word must match, the last one as a prefix
+    # ("dor cabe" finds "dor de cabeça"); FTS5 operators in the input are neutralized
+    words = re.findall(r"\w+", query or "")
+    if not words:
+        return None
+    terms = [f'"{w}"' for w in words]
+    terms[-1] += "*"
+    return " ".join(terms)
@@ -0,0 +1,44 @@
+from typing import Optional
+from sqlalchemy.orm import Session
+from .config import get_session
+from .archive_repo import ArchiveRepository
+from .doctor_repo import DoctorRepository
+from .outbox_repo import OutboxRepository
+from .patient_repo import PatientRepository
+from .session_repo import SessionRepository
+from .stats_repo import StatsRepository
+from .triage_repo import TriageRepository
+
+
+class UnitOfWork:
+    # One session and one transaction shared by every repository:
+    #
+    #   with UnitOfWork() as uow:
+    #       patient_id = uow.patients.upsert_by_cpf(...)
+    #       uow.triages.create(..., patient_id=patient_id)
+    #
+    # commits once on a clean exit, rolls back on an exception, and always returns
+    # the connection to the pool.
+    def __init__(self):
+        self.session: Optional[Session] = None
+
+    def __enter__(self):
+        self.session = get_session()
+        self.patients = PatientRepository(self.session)
+        self.doctors = DoctorRepository(self.session)
+        self.triages = TriageRepository(self.session)
+        self.sessions = SessionRepository(self.session)
+        self.outbox = OutboxRepository(self.session)
+        self.archive = ArchiveRepository(self.session)
+        self.stats = StatsRepository(self.session)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.session.commit()
+            else:
+                self.session.rollback()
+        finally:
+            self.session.close()
+            self.session = None
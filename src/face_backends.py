@@ -0,0 +1,117 @@
+# face_backends.py
+import os
+import cv2
+import numpy as np
+from config import CONFIG
+
+
+class FaceBackend:
+    name = "base"
+    # True when the backend needs the BGR frame instead of grayscale
+    needs_color = False
+
+    def detect(self, image):
+        # returns a list of (x, y, w, h) boxes in `image` coordinates
+        raise NotImplementedError
+
+
+class CascadeBackend(FaceBackend):
+    def __init__(self, cascade_path, scale_factor=None, min_neighbors=None):
+        if not os.path.isfile(cascade_path):
+            raise FileNotFoundError(f"Cascade não encontrado: {cascade_path}")
+        self.cascade = cv2.CascadeClassifier(cascade_path)
+        if self.cascade.empty():
+            raise ValueError(f"Falha ao carregar cascade: {cascade_path}")
+        self.scale_factor = CONFIG.FACE_SCALE_FACTOR if scale_factor is None else scale_factor
+        self.min_neighbors = CONFIG.FACE_MIN_NEIGHBORS if min_neighbors is None else min_neighbors
+
+    def detect(self, image):
+        found = self.cascade.detectMultiScale(image, self.scale_factor, self.min_neighbors)
+        return [tuple(int(v) for v in f) for f in found]
+
+
+class HaarBackend(CascadeBackend):
+    name = "haar"
+
+    def __init__(self, **kwargs):
+        super().__init__(cv2.data.haarcascades + "haarcascade_frontalface_default.xml", **kwargs)
+
+
+class LbpBackend(CascadeBackend):
+    name = "lbp"
+
+    def __init__(self, **kwargs):
+        # LBP cascades are not shipped with the opencv-python wheels, so they load from a local file
+        super().__init__(CONFIG.FACE_LBP_CASCADE, **kwargs)
+
+
+class DnnBackend(FaceBackend):
+    # OpenCV res10 SSD face detector (Caffe), run on CPU through cv2.dnn
+    name = "dnn"
+    needs_color = True
+
+    def __init__(self, model=None, proto=None, confidence=None):
+        model = model or CONFIG.FACE_DNN_MODEL
+        proto = proto or CONFIG.FACE_DNN_PROTO
+        for path in (model, proto):
+            if not os.path.isfile(path):
+                raise FileNotFoundError(f"Modelo não encontrado: {path}")
+        self.net = cv2.dnn.readNetFromCaffe(proto, model)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        self.confidence = CONFIG.FACE_DNN_CONFIDENCE if confidence is None else confidence
+
+    def detect(self, image):
+        h, w = image.shape[:2]
+        blob = cv2.dnn.blobFromImage(image, 1.0, (300, 300), (104.0, 177.0, 123.0))
+        self.net.setInput(blob)
+        out = self.net.forward()[0, 0]
+        out = out[out[:, 2] >= self.confidence]
+
+        faces = []
+        for det in out:
+            x0, y0, x1, y1 = (det[3:7] * np.array([w, h, w, h])).astype(int)
+            x0, y0 = max(0, x0), max(0, y0)
+            x1, y1 = min(w, x1), min(h, y1)
+            if x1 > x0 and y1 > y0:
+                faces.append((int(x0), int(y0), int(x1 - x0), int(y1 - y0)))
+        return faces
+
+
+class YuNetBackend(FaceBackend):
+    name = "yunet"
+    needs_color = True
+
+    def __init__(self, model=None, confidence=None):
+        model = model or CONFIG.FACE_YUNET_MODEL
+        if not os.path.isfile(model):
+            raise FileNotFoundError(f"Modelo não encontrado: {model}")
+        if confidence is None:
+            confidence = CONFIG.FACE_DNN_CONFIDENCE
+        self.detector = cv2.FaceDetectorYN.create(model, "", (320, 320), confidence)
+        self._input_size = (320, 320)
+
+    def detect(self, image):
+        h, w = image.shape[:2]
+        if (w, h) != self._input_size:
+            self.detector.setInputSize((w, h))
+            self._input_size = (w, h)
+        _, found = self.detector.detect(image)
+        if found is None:
+            return []
+        return [tuple(int(v) for v in f[:4]) for f in found]
+
+
+BACKENDS = {
+    HaarBackend.name: HaarBackend,
+    LbpBackend.name: LbpBackend,
+    DnnBackend.name: DnnBackend,
+    YuNetBackend.name: YuNetBackend,
+}
+
+
+def create_backend(name=None, **kwargs) -> FaceBackend:
+    name = name or CONFIG.FACE_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Backend de detecção desconhecido: {name} (opções: {', '.join(BACKENDS)})")
+    return BACKENDS[name](**kwargs)
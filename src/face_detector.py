@@ -1,23 +1,76 @@
 import cv2
-import time
 from config import CONFIG
+from face_backends import create_backend
 
 
 class FaceDetector:
-    def __init__(self):
-        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
-        self.last_seen = None
+    def __init__(self, backend=None, downscale=None, rescan_interval=None, roi_margin=None):
+        # backend: a FaceBackend instance or a backend name (defaults to CONFIG.FACE_BACKEND)
+        self.backend = backend if hasattr(backend, "detect") else create_backend(backend)
+        self.downscale = CONFIG.FACE_DOWNSCALE if downscale is None else downscale
+        self.rescan_interval = CONFIG.FACE_RESCAN_INTERVAL if rescan_interval is None else rescan_interval
+        self.roi_margin = CONFIG.FACE_ROI_MARGIN if roi_margin is None else roi_margin
+
+        # tracking state: last face box (original coordinates) and frames since the last full scan
+        self.last_box = None
+        self.frames_since_scan = 0
 
 
     def detect(self, frame):
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
-        if len(faces) > 0:
-            self.last_seen = time.time()
+        image = frame if self.backend.needs_color else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        faces = []
+        if self.last_box is not None and self.frames_since_scan < self.rescan_interval:
+            faces = self._track(image)
+            self.frames_since_scan += 1
+
+        # periodic re-scan, or the tracked face was lost
+        if not faces:
+            faces = self._scan(image, 0, 0)
+            self.frames_since_scan = 0
+
+        if faces:
+            self.last_box = max(faces, key=lambda f: f[2] * f[3])
+        else:
+            self.last_box = None
         return faces
 
 
-    def face_timed_out(self):
-        if self.last_seen is None:
-            return False
-        return (time.time() - self.last_seen) > CONFIG.FACE_DETECTION_TIMEOUT
\ No newline at end of file
+    def reset(self):
+        self.last_box = None
+        self.frames_since_scan = 0
+
+
+    def _track(self, image):
+        x, y, w, h = self.last_box
+        mx, my = int(w * self.roi_margin), int(h * self.roi_margin)
+        fh, fw = image.shape[:2]
+        x0, y0 = max(0, x - mx), max(0, y - my)
+        x1, y1 = min(fw, x + w + mx), min(fh, y + h + my)
+        if x1 <= x0 or y1 <= y0:
+            return []
+
+        faces = self._scan(image[y0:y1, x0:x1], x0, y0)
+        if not faces:
+            return []
+        # only keep the face closest to the one we were tracking
+        cx, cy = x + w / 2, y + h / 2
+        return [min(faces, key=lambda f: (f[0] + f[2] / 2 - cx) ** 2 + (f[1] + f[3] / 2 - cy) ** 2)]
+
+
+    def _scan(self, image, off_x, off_y):
+        ratio = self.downscale
+        if 0 < ratio < 1:
+            small = cv2.resize(image, None, fx=ratio, fy=ratio, interpolation=cv2.INTER_AREA)
+        else:
+            ratio = 1.0
+            small = image
+
+        found = self.backend.detect(small)
+
+        # map boxes back to original frame coordinates
+        return [
+            (int(fx / ratio) + off_x, int(fy / ratio) + off_y, int(fw / ratio), int(fh / ratio))
+            for (fx, fy, fw, fh) in found
+        ]
+
@@ -0,0 +1,83 @@
+# import_registry.py
+# Imports an existing patient or doctor registry from CSV or JSONL.
+# Rows are written with executemany, one transaction per chunk. By default
+# existing CPFs are updated in place (upsert).
+#
+#   python src/import_registry.py pacientes.csv
+#   python src/import_registry.py medicos.jsonl --kind doctors --mode create
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from sqlalchemy.exc import IntegrityError
+from db.config import engine
+from db.models import Base
+from db.patient_repo import PatientRepository
+from db.doctor_repo import DoctorRepository
+
+REPOSITORIES = {"patients": PatientRepository, "doctors": DoctorRepository}
+REQUIRED = ("name", "cpf")
+
+
+def read_rows(path, fmt):
+    if fmt == "csv":
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            for row in csv.DictReader(f):
+                yield {k.strip(): (v.strip() or None if isinstance(v, str) else v) for k, v in row.items() if k}
+    else:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def valid_rows(rows, skipped):
+    for n, row in enumerate(rows, 1):
+        if all(row.get(c) for c in REQUIRED):
+            yield row
+        else:
+            skipped.append(n)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importa cadastro de pacientes ou médicos (CSV/JSONL)")
+    parser.add_argument("file")
+    parser.add_argument("--kind", choices=list(REPOSITORIES), default="patients")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="padrão: pela extensão do arquivo")
+    parser.add_argument("--mode", choices=["upsert", "create"], default="upsert",
+                        help="create falha se algum CPF já existir")
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    if not os.path.isfile(args.file):
+        print(f"Arquivo não encontrado: {args.file}")
+        return 1
+    fmt = args.format or ("jsonl" if args.file.lower().endswith((".jsonl", ".ndjson")) else "csv")
+
+    Base.metadata.create_all(engine)
+    repo = REPOSITORIES[args.kind]()
+    write = repo.bulk_upsert if args.mode == "upsert" else repo.bulk_create
+
+    skipped = []
+    t0 = time.perf_counter()
+    try:
+        total = write(valid_rows(read_rows(args.file, fmt), skipped), chunk_size=args.chunk_size)
+    except IntegrityError as e:
+        # chunks committed before the failing one are kept
+        repo.session.rollback()
+        print(f"Erro de integridade (CPF já cadastrado? use --mode upsert): {e.orig}")
+        return 1
+    elapsed = time.perf_counter() - t0
+
+    print(f"{total} registros importados em {elapsed:.2f}s ({total / max(elapsed, 1e-9):.0f}/s)")
+    if skipped:
+        preview = ", ".join(map(str, skipped[:10]))
+        print(f"{len(skipped)} linhas ignoradas sem nome/CPF (linhas: {preview}{'...' if len(skipped) > 10 else ''})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,25 +5,37 @@ from network_client import NetworkClient
 from triage_manager import TriageManager
 from ui import UI
 from db.config import engine
-from db.models import Base
+from db.models import Base, ensure_indexes
+from db.triage_search import ensure_search_table
 
-# Ensure DB tables exist
-Base.metadata.create_all(engine)
 
-# Init components
-face_detector = FaceDetector()
-voice_recorder = VoiceRecorder(filename="patient.wav")
-network_client = NetworkClient()
-triage_manager = TriageManager()
+def main():
+    # Everything is built here, not at import time: PDF worker processes are
+    # spawned and re-import this module as __mp_main__, and must not open a second
+    # window, camera, outbox or network connection.
+
+    # Ensure DB tables exist
+    Base.metadata.create_all(engine)
+    ensure_indexes(engine)
+    ensure_search_table(engine)
+
+    # Init components
+    face_detector = FaceDetector()
+    voice_recorder = VoiceRecorder(filename="patient.wav")
+    network_client = NetworkClient()
+    network_client.warm_up()
+    triage_manager = TriageManager()
+
+    # Start UI (UI will create sessions on demand)
+    app_ui = UI(
+        face_detector=face_detector,
+        voice_recorder=voice_recorder,
+        network_client=network_client,
+        triage_manager=triage_manager
+    )
+    app_ui.run()
 
-# Start UI (UI will create sessions on demand)
-app_ui = UI(
-    face_detector=face_detector,
-    voice_recorder=voice_recorder,
-    network_client=network_client,
-    triage_manager=triage_manager
-)
 
 # Run app
 if __name__ == "__main__":
-    app_ui.run()
+    main()
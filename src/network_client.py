@@ -1,11 +1,261 @@
 # network_client.py
 import requests
+from requests.adapters import HTTPAdapter
 from config import CONFIG
 import base64
-from typing import Any, Dict
+import io
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+import zlib
+from typing import Any, Dict, Optional
+
+RETRY_STATUS = {429, 502, 503, 504}
+READ_BLOCK = 64 * 1024
+
+
+def _audio_content_type(path):
+    return "audio/flac" if path.lower().endswith(".flac") else "audio/wav"
+
+
+class MultipartFile:
+    # multipart/form-data body that reads the audio file from disk as requests
+    # sends it, so an upload never holds more than one block of the file in memory
+    def __init__(self, path: str, fields: Dict[str, str], file_field: str = "audio"):
+        self.boundary = uuid.uuid4().hex
+        head = "".join(
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="{k}"\r\n\r\n{v}\r\n'
+            for k, v in fields.items()
+        )
+        head += (
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="{file_field}"; '
+            f'filename="{os.path.basename(path)}"\r\nContent-Type: {_audio_content_type(path)}\r\n\r\n'
+        )
+        head = head.encode("utf-8")
+        tail = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+        self._length = len(head) + os.path.getsize(path) + len(tail)
+        self._parts = [io.BytesIO(head), open(path, "rb"), io.BytesIO(tail)]
+
+    @property
+    def content_type(self):
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        try:
+            for part in self._parts:
+                while True:
+                    block = part.read(READ_BLOCK)
+                    if not block:
+                        break
+                    yield block
+        finally:
+            self.close()
+
+    def close(self):
+        for part in self._parts:
+            part.close()
+
+
+class GzipBody:
+    # streaming gzip of `source` (an iterable of byte blocks); the compressed size is
+    # unknown upfront so this goes out chunked. close() closes the source even if
+    # the upload failed before the body was read.
+    def __init__(self, source):
+        self.source = source
+
+    def __iter__(self):
+        z = zlib.compressobj(6, zlib.DEFLATED, 31)
+        for block in self.source:
+            out = z.compress(block)
+            if out:
+                yield out
+        yield z.flush()
+
+    def close(self):
+        if hasattr(self.source, "close"):
+            self.source.close()
+
+
+class FileBlocks:
+    # an open file read in READ_BLOCK pieces
+    def __init__(self, path):
+        self._f = open(path, "rb")
+
+    def __iter__(self):
+        return iter(lambda: self._f.read(READ_BLOCK), b"")
+
+    def close(self):
+        self._f.close()
+
+
+class AudioStream:
+    # Uploads audio chunks with chunked transfer encoding while the patient is
+    # still speaking. push() is safe to call from the sounddevice callback;
+    # close() queues the end-of-stream marker and result() waits for the reply.
+    _END = None
+
+    def __init__(self, endpoint: str, session_id: str, samplerate: int, channels: int = 1,
+                 dtype: str = "float32", timeout=60, http=None, idempotency_key: Optional[str] = None):
+        self.endpoint = endpoint
+        self.http = http or requests
+        self.session_id = session_id
+        self.headers = {
+            "Content-Type": "application/octet-stream",
+            "X-Session-Id": session_id,
+            "X-Sample-Rate": str(samplerate),
+            "X-Channels": str(channels),
+            "X-Sample-Format": dtype,
+        }
+        if idempotency_key:
+            self.headers["Idempotency-Key"] = idempotency_key
+        self.timeout = timeout
+        self.bytes_sent = 0
+        self._queue: "queue.Queue[Optional[bytes]]" = queue.Queue()
+        self._closed = False
+        self._response: Optional[Dict[str, Any]] = None
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def push(self, chunk):
+        if not self._closed:
+            self._queue.put_nowait(chunk.tobytes() if hasattr(chunk, "tobytes") else bytes(chunk))
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._queue.put_nowait(self._END)
+
+    def result(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        self.close()
+        if timeout is None:
+            timeout = sum(self.timeout) if isinstance(self.timeout, tuple) else self.timeout
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            raise TimeoutError("Streaming de áudio não terminou a tempo")
+        if self._error is not None:
+            raise self._error
+        return self._response
+
+    def _body(self):
+        while True:
+            chunk = self._queue.get()
+            if chunk is self._END:
+                # ending the generator sends the terminating zero-length chunk
+                return
+            self.bytes_sent += len(chunk)
+            yield chunk
+
+    def _run(self):
+        try:
+            # a streamed body cannot be replayed, so there is no retry here; the caller
+            # falls back to the one-shot upload of the recorded file instead
+            resp = self.http.post(self.endpoint, data=self._body(), headers=self.headers, timeout=self.timeout)
+            resp.raise_for_status()
+            self._response = resp.json()
+        except BaseException as e:
+            self._error = e
+            # unblock the recorder side if the upload died early
+            self._closed = True
+
 
 class NetworkClient:
-    def send_audio(self, filepath: str, session_id: str) -> Dict[str, Any]:
+    # One long-lived requests.Session so uploads reuse pooled keep-alive connections
+    # instead of paying a TCP+TLS handshake each time.
+    def __init__(self, endpoint: Optional[str] = None):
+        self.endpoint = endpoint or CONFIG.N8N_ENDPOINT
+        self.timeout = (CONFIG.HTTP_CONNECT_TIMEOUT, CONFIG.HTTP_READ_TIMEOUT)
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=CONFIG.HTTP_POOL_SIZE,
+                              pool_block=False, max_retries=0)
+        self.http.mount("http://", adapter)
+        self.http.mount("https://", adapter)
+        self.http.headers["Connection"] = "keep-alive"
+
+    def warm_up(self, background: bool = True):
+        # open a pooled connection ahead of the first patient; any response will do
+        def _warm():
+            for url in filter(None, {self.endpoint, CONFIG.N8N_STREAM_ENDPOINT}):
+                try:
+                    self.http.head(url, timeout=self.timeout, allow_redirects=False)
+                except requests.RequestException:
+                    pass
+
+        if background:
+            threading.Thread(target=_warm, daemon=True).start()
+        else:
+            _warm()
+
+    def _post(self, url: str, idempotency_key: str, make_request) -> requests.Response:
+        # Bounded exponential backoff with jitter. The same Idempotency-Key is sent on
+        # every attempt so the endpoint can drop duplicates of a turn it already handled.
+        # make_request() builds fresh post() kwargs per attempt, since streamed bodies
+        # are consumed by the previous try.
+        attempts = CONFIG.HTTP_RETRIES + 1
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            kwargs = make_request()
+            kwargs.setdefault("headers", {})["Idempotency-Key"] = idempotency_key
+            try:
+                resp = self.http.post(url, timeout=self.timeout, **kwargs)
+                if resp.status_code not in RETRY_STATUS or last:
+                    resp.raise_for_status()
+                    return resp
+                # hand the connection back to the pool before sleeping
+                resp.close()
+            except (requests.ConnectionError, requests.Timeout):
+                if last:
+                    raise
+            finally:
+                # release file handles held by streamed bodies
+                body = kwargs.get("data")
+                if hasattr(body, "close"):
+                    body.close()
+            delay = min(CONFIG.HTTP_BACKOFF_MAX, CONFIG.HTTP_BACKOFF_BASE * (2 ** attempt))
+            time.sleep(delay * random.uniform(0.5, 1.0))
+
+    @staticmethod
+    def idempotency_key(session_id: str, turn: Optional[int] = None) -> str:
+        return f"{session_id}:{turn}" if turn is not None else f"{session_id}:{uuid.uuid4()}"
+
+    def send_audio(self, filepath: str, session_id: str, turn: Optional[int] = None,
+                   encoding: Optional[str] = None) -> Dict[str, Any]:
+        # encoding: "json" (base64 inside JSON, the original format), "multipart" or
+        # "binary" (raw body, session in headers); defaults to CONFIG.AUDIO_UPLOAD_ENCODING
+        encoding = encoding or CONFIG.AUDIO_UPLOAD_ENCODING
+        builders = {
+            "json": self._json_request,
+            "multipart": self._multipart_request,
+            "binary": self._binary_request,
+        }
+        if encoding not in builders:
+            raise ValueError(f"Codificação de envio desconhecida: {encoding}")
+        build = builders[encoding]
+
+        resp = self._post(self.endpoint, self.idempotency_key(session_id, turn),
+                          lambda: build(filepath, session_id))
+        return resp.json()
+
+    def send_turn(self, filepath: str, session_id: str, turn: Optional[int] = None,
+                  stream: Optional[AudioStream] = None, on_fallback=None) -> Dict[str, Any]:
+        # Reply for a recorded turn: the streamed upload's, when one was started and
+        # succeeded, otherwise the one-shot upload of the recorded file.
+        # on_fallback(error) is called when a stream had to be abandoned.
+        if stream is not None:
+            try:
+                return stream.result()
+            except Exception as e:
+                if on_fallback:
+                    on_fallback(e)
+        return self.send_audio(filepath, session_id, turn=turn)
+
+    def _json_request(self, filepath, session_id):
         with open(filepath, "rb") as f:
             audio_b64 = base64.b64encode(f.read()).decode("utf-8")
 
@@ -13,7 +263,35 @@ class NetworkClient:
             "audio": audio_b64,
             "session_id": session_id
         }
+        return {"json": payload}
 
-        resp = requests.post(CONFIG.N8N_ENDPOINT, json=payload, timeout=60)
-        resp.raise_for_status()
-        return resp.json()
+    def _multipart_request(self, filepath, session_id):
+        body = MultipartFile(filepath, {"session_id": session_id})
+        headers = {"Content-Type": body.content_type}
+        if CONFIG.AUDIO_UPLOAD_GZIP:
+            headers["Content-Encoding"] = "gzip"
+            return {"data": GzipBody(body), "headers": headers}
+        return {"data": body, "headers": headers}
+
+    def _binary_request(self, filepath, session_id):
+        headers = {
+            "Content-Type": _audio_content_type(filepath),
+            "X-Session-Id": session_id,
+            "X-Filename": os.path.basename(filepath),
+        }
+        if CONFIG.AUDIO_UPLOAD_GZIP:
+            headers["Content-Encoding"] = "gzip"
+            return {"data": GzipBody(FileBlocks(filepath)), "headers": headers}
+        # requests streams open files with a Content-Length taken from the file size
+        return {"data": open(filepath, "rb"), "headers": headers}
+
+    def start_stream(self, session_id: str, samplerate: int, channels: int = 1,
+                     dtype: str = "float32", turn: Optional[int] = None) -> Optional[AudioStream]:
+        if CONFIG.AUDIO_UPLOAD_MODE != "stream" or not CONFIG.N8N_STREAM_ENDPOINT:
+            return None
+        return AudioStream(CONFIG.N8N_STREAM_ENDPOINT, session_id, samplerate, channels, dtype,
+                           timeout=self.timeout, http=self.http,
+                           idempotency_key=self.idempotency_key(session_id, turn))
+
+    def close(self):
+        self.http.close()
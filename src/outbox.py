@@ -0,0 +1,142 @@
+# outbox.py
+import logging
+import threading
+from typing import Callable, Dict, Optional
+import requests
+from config import CONFIG
+from db.outbox_repo import OutboxRepository
+
+log = logging.getLogger(__name__)
+
+# 4xx answers that may succeed later (timeout, conflict, too early, rate limit)
+RETRYABLE_4XX = {408, 409, 425, 429}
+
+
+def is_permanent(error: Exception) -> bool:
+    # errors that a retry cannot fix: the recording is gone, the endpoint rejects
+    # the request, or the handler itself is broken (a bug, not an outage)
+    if isinstance(error, FileNotFoundError):
+        return True
+    if isinstance(error, requests.HTTPError):
+        status = error.response.status_code if error.response is not None else None
+        return status is not None and 400 <= status < 500 and status not in RETRYABLE_4XX
+    if isinstance(error, requests.RequestException):
+        return False
+    return isinstance(error, (AttributeError, TypeError, KeyError, IndexError, ValueError))
+
+
+class Outbox:
+    # Durable upload queue. Every recorded turn is written to the `outbox` table
+    # before any network I/O, and a small worker pool drains it:
+    #   - at most CONFIG.OUTBOX_WORKERS uploads run at once,
+    #   - turns of one session are sent one at a time and in order,
+    #   - failures are retried with capped backoff, so the kiosk keeps working
+    #     through network outages, up to CONFIG.OUTBOX_MAX_ATTEMPTS,
+    #   - permanent errors (see is_permanent) and exhausted items are marked
+    #     "failed" and no longer block the later turns of their session,
+    #   - items interrupted by a crash are picked up again on the next start.
+    #
+    # handler(item, stream) does the upload and completion work for one item and
+    # raises to request a retry. on_change(pending, failed) gets the queue counts.
+    def __init__(self, handler: Callable[[Dict, object], None],
+                 on_change: Optional[Callable[[int, int], None]] = None, workers: Optional[int] = None):
+        self.handler = handler
+        self.on_change = on_change
+        self.workers = workers or CONFIG.OUTBOX_WORKERS
+        self.running = False
+        self._cond = threading.Condition()
+        self._busy_sessions = set()
+        # live streaming uploads, by outbox item id; lost on restart, which just
+        # means those items fall back to the one-shot upload of the file. Callers only
+        # start a stream when the session has nothing queued, so it cannot overtake
+        # an earlier turn
+        self._streams: Dict[int, object] = {}
+        self._threads = []
+
+    def start(self):
+        if self.running:
+            return
+        with OutboxRepository() as repo:
+            recovered = repo.recover()
+        if recovered:
+            log.info("%d envio(s) interrompido(s) retomado(s)", recovered)
+        self.running = True
+        for _ in range(self.workers):
+            t = threading.Thread(target=self._worker, daemon=True)
+            t.start()
+            self._threads.append(t)
+        self._notify()
+
+    def stop(self, timeout: float = 2.0):
+        self.running = False
+        with self._cond:
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join(timeout=timeout)
+        self._threads = []
+
+    def enqueue(self, session_id: str, turn: int, audio_path: str,
+                doctor_id: Optional[int] = None, stream=None) -> int:
+        with self._cond:
+            with OutboxRepository() as repo:
+                item_id = repo.enqueue(session_id, turn, audio_path, doctor_id)
+            if stream is not None:
+                self._streams[item_id] = stream
+            self._cond.notify()
+        self._notify()
+        return item_id
+
+    def pending(self, session_id: Optional[str] = None) -> int:
+        # items still to be sent; failed items are not counted (see failed())
+        with OutboxRepository() as repo:
+            return repo.pending_count(session_id)
+
+    def failed(self, session_id: Optional[str] = None) -> int:
+        with OutboxRepository() as repo:
+            return repo.failed_count(session_id)
+
+    def _claim(self):
+        with self._cond:
+            while self.running:
+                with OutboxRepository() as repo:
+                    item = repo.claim_next(exclude_sessions=self._busy_sessions)
+                if item:
+                    self._busy_sessions.add(item["session_id"])
+                    return item, self._streams.pop(item["id"], None)
+                self._cond.wait(timeout=CONFIG.OUTBOX_POLL_SECONDS)
+        return None, None
+
+    def _worker(self):
+        while self.running:
+            item, stream = self._claim()
+            if item is None:
+                return
+
+            try:
+                self.handler(item, stream)
+                with OutboxRepository() as repo:
+                    repo.mark_done(item["id"])
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                if is_permanent(e) or item["attempts"] >= CONFIG.OUTBOX_MAX_ATTEMPTS:
+                    log.error("envio %s (sessão %s, turno %s) falhou definitivamente: %s",
+                              item["id"], item["session_id"], item["turn"], error)
+                    with OutboxRepository() as repo:
+                        repo.mark_failed(item["id"], error)
+                else:
+                    delay = min(CONFIG.OUTBOX_BACKOFF_MAX, CONFIG.OUTBOX_BACKOFF_BASE * (2 ** (item["attempts"] - 1)))
+                    with OutboxRepository() as repo:
+                        repo.mark_retry(item["id"], error, delay)
+            finally:
+                with self._cond:
+                    self._busy_sessions.discard(item["session_id"])
+                    # the next turn of this session (or a retry) may now be due
+                    self._cond.notify_all()
+            self._notify()
+
+    def _notify(self):
+        if self.on_change:
+            try:
+                self.on_change(self.pending(), self.failed())
+            except Exception:
+                pass
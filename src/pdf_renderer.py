@@ -0,0 +1,163 @@
+# pdf_renderer.py
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import List, Optional
+from config import CONFIG
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+
+class PageTemplate:
+    # Static layout for the triage record, computed once per process and reused
+    # for every document. The header's content stream (encoded title, font and
+    # position operators) is built on the first document and cached here; each
+    # PDF still needs its own form XObject, which is just that cached stream,
+    # stamped on every page.
+    def __init__(self, title="Prontuário de Triagem", pagesize=A4, margin=40,
+                 font="Helvetica", font_size=10, title_font="Helvetica-Bold", title_size=14,
+                 line_height=14):
+        self.title = title
+        self.pagesize = pagesize
+        self.width, self.height = pagesize
+        self.margin = margin
+        self.font = font
+        self.font_size = font_size
+        self.title_font = title_font
+        self.title_size = title_size
+        self.line_height = line_height
+        self.text_width = self.width - 2 * margin
+        self.space_width = stringWidth(" ", font, font_size)
+        self.top = self.height - margin
+        self.first_body_y = self.top - 2 * line_height
+        self._header_code = None
+
+    def begin(self, path):
+        c = canvas.Canvas(path, pagesize=self.pagesize, pageCompression=1)
+        # registers the title font; a fresh canvas always assigns it the same
+        # internal name, so the cached operators stay valid across documents
+        c.setFont(self.title_font, self.title_size)
+        if self._header_code is None:
+            text = c.beginText(self.margin, self.top)
+            text.setFont(self.title_font, self.title_size)
+            text.textOut(self.title)
+            self._header_code = text.getCode()
+        c.beginForm("header")
+        c.addLiteral(self._header_code)
+        c.endForm()
+        return c
+
+    def wrap(self, text: str) -> List[str]:
+        return wrap_text(text, self.font, self.font_size, self.text_width)
+
+
+@lru_cache(maxsize=20000)
+def _word_width(word: str, font: str, size: float) -> float:
+    return stringWidth(word, font, size)
+
+
+def wrap_text(text: str, font: str, size: float, max_width: float) -> List[str]:
+    # greedy wrap on real glyph widths; an empty line is kept for blank paragraphs
+    space = _word_width(" ", font, size)
+    lines = []
+    for para in text.split("\n"):
+        words = para.split()
+        if not words:
+            lines.append("")
+            continue
+        current, width = [], 0.0
+        for word in words:
+            w = _word_width(word, font, size)
+            if w > max_width:
+                # a single word wider than the line is hard-split by characters
+                if current:
+                    lines.append(" ".join(current))
+                    current, width = [], 0.0
+                piece = ""
+                for ch in word:
+                    if _word_width(piece + ch, font, size) > max_width and piece:
+                        lines.append(piece)
+                        piece = ""
+                    piece += ch
+                current, width = [piece], _word_width(piece, font, size)
+                continue
+            extra = w if not current else space + w
+            if current and width + extra > max_width:
+                lines.append(" ".join(current))
+                current, width = [word], w
+            else:
+                current.append(word)
+                width += extra
+        lines.append(" ".join(current))
+    return lines
+
+
+_template: Optional[PageTemplate] = None
+
+
+def _get_template() -> PageTemplate:
+    global _template
+    if _template is None:
+        _template = PageTemplate()
+    return _template
+
+
+def render_pdf(text: str, pdf_path: str) -> float:
+    # returns the render time in seconds
+    t0 = time.perf_counter()
+    tpl = _get_template()
+    c = tpl.begin(pdf_path)
+    c.doForm("header")
+    c.setFont(tpl.font, tpl.font_size)
+    y = tpl.first_body_y
+
+    for line in tpl.wrap(text or ""):
+        if line:
+            c.drawString(tpl.margin, y, line)
+        y -= tpl.line_height
+        if y < tpl.margin:
+            c.showPage()
+            c.doForm("header")
+            c.setFont(tpl.font, tpl.font_size)
+            y = tpl.first_body_y
+
+    c.save()
+    return time.perf_counter() - t0
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _init_worker():
+    # workers import only this module (and config); build the template up front
+    _get_template()
+
+
+def get_pool(workers: Optional[int] = None) -> ProcessPoolExecutor:
+    # Always spawn: forking the app would copy Tk, camera, audio and writer threads
+    # into the child. A spawned worker imports the entry module as __mp_main__,
+    # so the app must only be built under its __main__ guard (see main.py).
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers or CONFIG.PDF_WORKERS,
+                                        mp_context=multiprocessing.get_context("spawn"),
+                                        initializer=_init_worker)
+        return _pool
+
+
+def submit(text: str, pdf_path: str):
+    # render in a worker process; the future's result is the render time in seconds
+    return get_pool().submit(render_pdf, text, pdf_path)
+
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True)
@@ -0,0 +1,208 @@
+# persistence.py
+import atexit
+import logging
+import os
+import queue
+import itertools
+import threading
+from typing import Callable, Optional, Tuple, Union
+from config import CONFIG
+
+log = logging.getLogger(__name__)
+
+# payload: the file bytes, or a callable that writes the file at the given temp path
+Payload = Union[bytes, Callable[[str], None]]
+
+
+class _Prepared:
+    # a temp file produced outside the writer (see WriteBehindWriter.reserve)
+    def __init__(self, tmp_path: str):
+        self.tmp_path = tmp_path
+
+
+class WriteBehindWriter:
+    # Single background writer for session artifacts (triage.json, PDFs).
+    # Callers enqueue and return immediately; the writer drains the bounded queue
+    # in batches. Each file is written to a temp file beside its target. The temps
+    # in a batch are fsynced together and then renamed into place, so a crash leaves
+    # either the old file or the new one, never a half-written one. Writes to the
+    # same path within a batch are coalesced (last one wins).
+    # Files produced elsewhere (the PDF process pool) are reserved up front and
+    # handed over once complete, so the writer thread never waits on a render.
+    _STOP = object()
+
+    def __init__(self, max_queue: Optional[int] = None, batch_size: Optional[int] = None, fsync: Optional[bool] = None):
+        self.batch_size = batch_size or CONFIG.WRITER_BATCH_SIZE
+        self.fsync = CONFIG.WRITER_FSYNC if fsync is None else fsync
+        self.errors = []
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue or CONFIG.WRITER_QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._closed = False
+        self._outstanding = 0
+        self._outstanding_cond = threading.Condition()
+        self._tmp_ids = itertools.count()
+        self._thread.start()
+
+    def submit(self, path: str, payload: Payload, on_done: Optional[Callable[[str], None]] = None):
+        # blocks only when the queue is full (back-pressure instead of unbounded memory)
+        if self._closed:
+            raise RuntimeError("writer encerrado")
+        self._queue.put((path, payload, on_done))
+
+    def reserve(self, path: str, on_done: Optional[Callable[[str], None]] = None
+                ) -> Tuple[str, Callable[[Optional[BaseException]], None]]:
+        # For a file produced off this thread: returns (tmp_path, deliver). Write the
+        # complete file to tmp_path, then call deliver() to have it fsynced and renamed
+        # to `path`, or deliver(error) to drop it. flush() waits for the delivery.
+        if self._closed:
+            raise RuntimeError("writer encerrado")
+        tmp = f"{path}.{os.getpid()}.{next(self._tmp_ids)}.tmp"
+        with self._outstanding_cond:
+            self._outstanding += 1
+
+        def deliver(error: Optional[BaseException] = None):
+            try:
+                if error is None:
+                    self._queue.put((path, _Prepared(tmp), on_done))
+                else:
+                    self._fail(path, tmp, error)
+            finally:
+                with self._outstanding_cond:
+                    self._outstanding -= 1
+                    self._outstanding_cond.notify_all()
+
+        return tmp, deliver
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        # wait until everything submitted (or reserved) so far is on disk
+        with self._outstanding_cond:
+            if not self._outstanding_cond.wait_for(lambda: self._outstanding == 0, timeout):
+                return False
+        done = threading.Event()
+        self._queue.put((None, done.set, None))
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 10):
+        if self._closed:
+            return
+        self.flush(timeout)
+        self._closed = True
+        self._queue.put(self._STOP)
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = self._STOP in batch
+            self._write_batch([t for t in batch if t is not self._STOP])
+            if stop:
+                return
+
+    def _write_batch(self, batch):
+        pending = {}
+        barriers = []
+        for path, payload, on_done in batch:
+            if path is None:
+                barriers.append(payload)
+                continue
+            superseded = pending.pop(path, None)
+            if superseded and isinstance(superseded[0], _Prepared):
+                self._discard(superseded[0].tmp_path)
+            pending[path] = (payload, on_done)
+
+        written = []
+        for path, (payload, on_done) in pending.items():
+            if isinstance(payload, _Prepared):
+                written.append((path, payload.tmp_path, on_done))
+                continue
+            tmp = f"{path}.{os.getpid()}.tmp"
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                if callable(payload):
+                    payload(tmp)
+                else:
+                    with open(tmp, "wb") as f:
+                        f.write(payload)
+                written.append((path, tmp, on_done))
+            except Exception as e:
+                self._fail(path, tmp, e)
+
+        if self.fsync:
+            for path, tmp, _ in written:
+                try:
+                    fd = os.open(tmp, os.O_RDONLY)
+                    try:
+                        os.fsync(fd)
+                    finally:
+                        os.close(fd)
+                except OSError:
+                    pass
+
+        dirs = set()
+        for path, tmp, on_done in written:
+            try:
+                os.replace(tmp, path)
+                dirs.add(os.path.dirname(path) or ".")
+            except Exception as e:
+                self._fail(path, tmp, e)
+                continue
+            if on_done:
+                try:
+                    on_done(path)
+                except Exception as e:
+                    self.errors.append((path, e))
+
+        # make the renames themselves durable (not supported on Windows)
+        if self.fsync and hasattr(os, "O_DIRECTORY"):
+            for d in dirs:
+                try:
+                    fd = os.open(d, os.O_RDONLY | os.O_DIRECTORY)
+                    try:
+                        os.fsync(fd)
+                    finally:
+                        os.close(fd)
+                except OSError:
+                    pass
+
+        for release in barriers:
+            release()
+
+    def _fail(self, path, tmp, error):
+        self.errors.append((path, error))
+        log.error("falha ao gravar %s: %s", path, error)
+        self._discard(tmp)
+
+    @staticmethod
+    def _discard(tmp):
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+_writer: Optional[WriteBehindWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> WriteBehindWriter:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = WriteBehindWriter()
+            atexit.register(_writer.close)
+        return _writer
+
+
+def shutdown(timeout: Optional[float] = 10):
+    # flush pending artifacts; called from UI.close
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.close(timeout)
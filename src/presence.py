@@ -0,0 +1,72 @@
+# presence.py
+import threading
+import time
+import numpy as np
+from config import CONFIG
+
+
+class MotionDetector:
+    # Cheap frame-difference check on a subsampled single channel, meant to gate
+    # the face detector while the kiosk is idle.
+    def __init__(self, threshold=None, step=None):
+        self.threshold = CONFIG.IDLE_MOTION_THRESHOLD if threshold is None else threshold
+        self.step = CONFIG.IDLE_MOTION_STEP if step is None else step
+        self._prev = None
+
+    def check(self, frame) -> bool:
+        # green channel is a good enough luma proxy and avoids a full cvtColor
+        small = frame[::self.step, ::self.step, 1].astype(np.int16)
+        prev, self._prev = self._prev, small
+        if prev is None or prev.shape != small.shape:
+            return False
+        return float(np.abs(small - prev).mean()) > self.threshold
+
+    def reset(self):
+        self._prev = None
+
+
+class PresenceMonitor:
+    ACTIVE = "active"
+    IDLE = "idle"
+
+    def __init__(self, timeout=None, on_state_change=None):
+        self.timeout = CONFIG.FACE_DETECTION_TIMEOUT if timeout is None else timeout
+        self.state = self.ACTIVE
+        self.last_face_seen = None
+        self._active_since = time.time()
+        self._lock = threading.Lock()
+        self._listeners = []
+        if on_state_change:
+            self._listeners.append(on_state_change)
+
+    def add_listener(self, callback):
+        # callback(state) is called from the detector thread on every idle/active transition
+        self._listeners.append(callback)
+
+    @property
+    def idle(self) -> bool:
+        return self.state == self.IDLE
+
+    def update(self, face_found: bool, motion: bool = False):
+        now = time.time()
+        with self._lock:
+            if face_found:
+                self.last_face_seen = now
+                new_state = self.ACTIVE
+            elif motion:
+                # give whoever moved a full timeout window to show their face
+                self._active_since = now
+                new_state = self.ACTIVE
+            else:
+                reference = max(self.last_face_seen or 0, self._active_since)
+                new_state = self.IDLE if now - reference > self.timeout else self.state
+
+            changed = new_state != self.state
+            if changed and new_state == self.ACTIVE:
+                self._active_since = now
+            self.state = new_state
+
+        if changed:
+            for cb in self._listeners:
+                cb(new_state)
+        return new_state
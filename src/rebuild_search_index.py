@@ -0,0 +1,78 @@
+# rebuild_search_index.py
+# Rebuilds the full-text triage index (db/triage_search.py) from the finished
+# sessions under CONFIG.DATA_DIR and from the triages whose artifacts were moved
+# into the session archive.
+#
+#   python src/rebuild_search_index.py
+import argparse
+import json
+import os
+import sys
+import time
+from sqlalchemy import select
+from archive import ARCHIVE_SCHEME, read_artifact
+from config import CONFIG
+from db.bulk import chunked
+from db.config import engine, get_session
+from db.models import Base, TriageModel
+from db.triage_search import document, index_documents, optimize, reset_search_table
+
+
+def load_json(raw, label):
+    try:
+        return json.loads(raw)
+    except ValueError as e:
+        print(f"[{label}] triage.json ilegível: {e}")
+        return None
+
+
+def session_documents(data_dir, seen):
+    if not os.path.isdir(data_dir):
+        return
+    for name in sorted(os.listdir(data_dir)):
+        json_path = os.path.join(data_dir, name, "triage.json")
+        if not os.path.isfile(json_path):
+            continue
+        with open(json_path, "rb") as f:
+            data = load_json(f.read(), name)
+        doc = document(name, data)
+        if doc:
+            seen.add(name)
+            yield doc
+
+
+def archived_documents(seen):
+    stmt = select(TriageModel.code, TriageModel.path).where(TriageModel.path.startswith(ARCHIVE_SCHEME))
+    with get_session() as session:
+        rows = session.execute(stmt).all()
+    for code, path in rows:
+        if code in seen:
+            continue
+        raw = read_artifact(path, "triage.json")
+        doc = document(code, load_json(raw, code)) if raw else None
+        if doc:
+            seen.add(code)
+            yield doc
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reconstrói o índice de busca das triagens")
+    parser.add_argument("--data-dir", default=CONFIG.DATA_DIR)
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(engine)
+    reset_search_table(engine)
+    t0 = time.perf_counter()
+    seen = set()
+    total = 0
+    for source in (session_documents(args.data_dir, seen), archived_documents(seen)):
+        for batch in chunked(source, args.batch):
+            total += index_documents(batch)
+    optimize(engine)
+    print(f"{total} triagem(ns) indexada(s) em {time.perf_counter() - t0:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+# rerender_pdfs.py
+# Re-renders triage.pdf for every finished session under CONFIG.DATA_DIR in
+# parallel, e.g. after a template change.
+#
+#   python src/rerender_pdfs.py --workers 4
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import as_completed
+from config import CONFIG
+import pdf_renderer
+
+
+def find_sessions(data_dir):
+    for name in sorted(os.listdir(data_dir)):
+        json_path = os.path.join(data_dir, name, "triage.json")
+        if not os.path.isfile(json_path):
+            continue
+        try:
+            with open(json_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[{name}] triage.json ilegível: {e}")
+            continue
+        summary = (data.get("record") or {}).get("summary")
+        if summary:
+            yield name, summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-renderiza os PDFs das triagens finalizadas")
+    parser.add_argument("--data-dir", default=CONFIG.DATA_DIR)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--filename", default="triage.pdf")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.data_dir):
+        print(f"Diretório não encontrado: {args.data_dir}")
+        return 1
+
+    pool = pdf_renderer.get_pool(args.workers)
+    t0 = time.perf_counter()
+    futures = {}
+    for session_id, summary in find_sessions(args.data_dir):
+        pdf_path = os.path.join(args.data_dir, session_id, args.filename)
+        tmp_path = f"{pdf_path}.{os.getpid()}.tmp"
+        futures[pool.submit(pdf_renderer.render_pdf, summary, tmp_path)] = (session_id, pdf_path, tmp_path)
+
+    times, failed = [], 0
+    for fut in as_completed(futures):
+        session_id, pdf_path, tmp_path = futures[fut]
+        try:
+            elapsed = fut.result()
+            os.replace(tmp_path, pdf_path)
+        except Exception as e:
+            failed += 1
+            print(f"[{session_id}] falhou: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            continue
+        times.append(elapsed)
+        print(f"[{session_id}] {elapsed * 1000:.1f} ms")
+
+    total = time.perf_counter() - t0
+    pdf_renderer.shutdown()
+    if times:
+        times.sort()
+        print(f"\n{len(times)} PDF(s) em {total:.2f}s — média {sum(times) / len(times) * 1000:.1f} ms, "
+              f"p95 {times[int(0.95 * (len(times) - 1))] * 1000:.1f} ms, falhas {failed}")
+    else:
+        print("Nenhuma triagem finalizada encontrada.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+# stub_server.py
+# Local stand-in for the n8n webhook, for testing uploads without the real agent.
+#
+#   python src/stub_server.py --port 8765
+#
+#   POST /            JSON {"audio": <base64>, "session_id": ...}  (one-shot mode),
+#                     multipart form (session_id + audio) or raw audio with X-Session-Id;
+#                     Content-Encoding: gzip is accepted on all of them
+#   POST /stream      chunked raw PCM, X-Session-Id / X-Sample-Rate headers
+#
+# Every request gets a JSON reply in the same shape the agent returns, and is
+# logged in StubServer.requests with its status (failed attempts included). Sessions
+# are "finished" after --turns requests with the same session id. Repeated
+# Idempotency-Key headers get the cached reply, --fail-first N answers the
+# first N requests with 502 to exercise client retries, and --reject-chunked
+# answers chunked uploads with 411, like proxies that only accept Content-Length.
+import argparse
+import base64
+import gzip
+import json
+import threading
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _read_body(self) -> bytes:
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            body = bytearray()
+            while True:
+                size = int(self.rfile.readline().split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    # trailer section ends with an empty line
+                    while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                body += self.rfile.read(size)
+                self.rfile.readline()
+            return bytes(body)
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length) if length else b""
+
+    def do_HEAD(self):
+        # connection warm-up
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        chunked = "chunked" in self.headers.get("Transfer-Encoding", "").lower()
+        body = self._read_body()
+        if chunked and self.server.reject_chunked:
+            self.send_response(411)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.headers.get("Content-Encoding", "").lower() == "gzip":
+            body = gzip.decompress(body)
+        content_type = self.headers.get("Content-Type", "")
+
+        if self.path.rstrip("/").endswith("/stream"):
+            session_id = self.headers.get("X-Session-Id", "")
+            audio_bytes = len(body)
+            mode = "stream"
+        elif content_type.startswith("multipart/form-data"):
+            msg = BytesParser().parsebytes(b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body)
+            fields = {part.get_param("name", header="content-disposition"): part.get_payload(decode=True)
+                      for part in msg.get_payload()}
+            session_id = fields.get("session_id", b"").decode("utf-8")
+            audio_bytes = len(fields.get("audio", b""))
+            mode = "multipart"
+        elif not content_type.startswith("application/json"):
+            session_id = self.headers.get("X-Session-Id", "")
+            audio_bytes = len(body)
+            mode = "binary"
+        else:
+            payload = json.loads(body or b"{}")
+            session_id = payload.get("session_id", "")
+            audio_bytes = len(base64.b64decode(payload.get("audio", "")))
+            mode = "json"
+
+        idempotency_key = self.headers.get("Idempotency-Key")
+        if self.server.take_failure():
+            self.server.record(session_id, audio_bytes, mode, idempotency_key, 502)
+            self.send_response(502)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        reply = self.server.reply_for(session_id, audio_bytes, mode, idempotency_key)
+        data = json.dumps(reply, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, fmt, *args):
+        if not self.server.quiet:
+            super().log_message(fmt, *args)
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, turns=2, quiet=True, fail_first=0, reject_chunked=False):
+        super().__init__((host, port), StubHandler)
+        self.turns = turns
+        self.quiet = quiet
+        self.fail_first = fail_first
+        self.reject_chunked = reject_chunked
+        self.requests = []
+        self._counts = {}
+        self._replies = {}
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def take_failure(self) -> bool:
+        with self._lock:
+            if self.fail_first > 0:
+                self.fail_first -= 1
+                return True
+            return False
+
+    def record(self, session_id, audio_bytes, mode, idempotency_key, status):
+        with self._lock:
+            self.requests.append({"session_id": session_id, "bytes": audio_bytes, "mode": mode,
+                                  "idempotency_key": idempotency_key, "status": status})
+
+    def reply_for(self, session_id, audio_bytes, mode, idempotency_key=None):
+        self.record(session_id, audio_bytes, mode, idempotency_key, 200)
+        with self._lock:
+            if idempotency_key and idempotency_key in self._replies:
+                return self._replies[idempotency_key]
+            self._counts[session_id] = self._counts.get(session_id, 0) + 1
+            turn = self._counts[session_id]
+            reply = self._build_reply(session_id, audio_bytes, mode, turn)
+            if idempotency_key:
+                self._replies[idempotency_key] = reply
+            return reply
+
+    def _build_reply(self, session_id, audio_bytes, mode, turn):
+        if turn < self.turns:
+            return {"status": "pending", "message": f"Recebi {audio_bytes} bytes ({mode}). Pode continuar?"}
+        return {
+            "status": "finished",
+            "message": "Triagem concluída.",
+            "record": {
+                "summary": f"Resumo de teste para a sessão {session_id}.",
+                "patient": {"name": "Paciente Teste", "cpf": f"stub-{session_id[:8]}", "date_of_birth": None},
+            },
+        }
+
+    def start_background(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor stub do webhook n8n")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--turns", type=int, default=2, help="turnos até a triagem ser finalizada")
+    parser.add_argument("--fail-first", type=int, default=0, help="responde 502 às primeiras N requisições")
+    parser.add_argument("--reject-chunked", action="store_true", help="responde 411 a envios chunked")
+    args = parser.parse_args(argv)
+
+    server = StubServer(args.host, args.port, args.turns, quiet=False, fail_first=args.fail_first,
+                        reject_chunked=args.reject_chunked)
+    print(f"Stub escutando em {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
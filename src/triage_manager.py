@@ -1,24 +1,124 @@
 # triage_manager.py
-from typing import Dict, Optional
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from config import CONFIG
+from db.session_repo import SessionRepository
 from triage_session import TriageSession
 
 
 class TriageManager:
-    def __init__(self):
+    # Open sessions are kept in memory (insertion-ordered, O(1) get) and journaled to
+    # the triage_sessions table, so they survive a crash or restart. Sessions idle for
+    # longer than CONFIG.SESSION_TTL_SECONDS are evicted, and at most
+    # CONFIG.SESSION_MAX_OPEN stay open (least recently active go first).
+    # Listeners get deltas: callback(added_ids, removed_ids).
+    def __init__(self, ttl: Optional[float] = None, max_open: Optional[int] = None):
+        self.ttl = CONFIG.SESSION_TTL_SECONDS if ttl is None else ttl
+        self.max_open = CONFIG.SESSION_MAX_OPEN if max_open is None else max_open
         # session_id -> TriageSession
-        self.active_sessions: Dict[str, TriageSession] = {}
+        self.active_sessions: "OrderedDict[str, TriageSession]" = OrderedDict()
+        self._last_activity: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        self._listeners = []
+        self._rehydrate()
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def _notify(self, added: List[str], removed: List[str]):
+        if not added and not removed:
+            return
+        for cb in self._listeners:
+            cb(added, removed)
+
+    def _rehydrate(self):
+        with SessionRepository() as repo:
+            rows = repo.list_open()
+        for row in rows:
+            session = TriageSession(row["id"])
+            session.turns = max(session.turns, row["turns"])
+            self.active_sessions[session.id] = session
+            self._last_activity[session.id] = row["last_activity"]
+        self.evict_expired()
 
     def create_session(self) -> TriageSession:
         session = TriageSession()
-        self.active_sessions[session.id] = session
+        with SessionRepository() as repo:
+            repo.upsert_open(session.id)
+        with self._lock:
+            self.active_sessions[session.id] = session
+            self._last_activity[session.id] = time.time()
+        self._notify([session.id], [])
+        self._enforce_limit()
+        return session
+
+    def restore_session(self, session_id: str) -> TriageSession:
+        # reopen a session that is no longer in memory, e.g. queued turns after eviction
+        with self._lock:
+            session = self.active_sessions.get(session_id)
+            if session is not None:
+                return session
+            session = TriageSession(session_id)
+            self.active_sessions[session.id] = session
+            self._last_activity[session.id] = time.time()
+        with SessionRepository() as repo:
+            repo.upsert_open(session.id, session.turns)
+        self._notify([session.id], [])
         return session
 
+    def touch(self, session_id: str):
+        with self._lock:
+            session = self.active_sessions.get(session_id)
+            if session is None:
+                return
+            self._last_activity[session_id] = time.time()
+            turns = session.turns
+        with SessionRepository() as repo:
+            repo.touch(session_id, turns)
+
     def list_sessions(self):
-        return [(sid, s.meta) for sid, s in self.active_sessions.items()]
+        with self._lock:
+            return [(sid, s.meta) for sid, s in self.active_sessions.items()]
+
+    def session_ids(self) -> List[str]:
+        with self._lock:
+            return list(self.active_sessions)
 
     def get_session(self, session_id: str) -> Optional[TriageSession]:
         return self.active_sessions.get(session_id)
 
     def finish_session(self, session_id: str):
-        if session_id in self.active_sessions:
-            del self.active_sessions[session_id]
+        removed = self._remove([session_id], "finished")
+        self._notify([], removed)
+
+    def evict_expired(self, now: Optional[float] = None) -> List[str]:
+        now = now or time.time()
+        with self._lock:
+            expired = [sid for sid, t in self._last_activity.items() if now - t > self.ttl]
+        removed = self._remove(expired, "expired")
+        removed += self._enforce_limit(notify=False)
+        self._notify([], removed)
+        return removed
+
+    def _enforce_limit(self, notify: bool = True) -> List[str]:
+        with self._lock:
+            excess = len(self.active_sessions) - self.max_open
+            if excess <= 0:
+                return []
+            oldest = sorted(self._last_activity, key=self._last_activity.get)[:excess]
+        # still live, just over the cap: not an expiry, and not counted as one
+        removed = self._remove(oldest, "evicted")
+        if notify:
+            self._notify([], removed)
+        return removed
+
+    def _remove(self, session_ids: List[str], status: str) -> List[str]:
+        with self._lock:
+            removed = [sid for sid in session_ids if self.active_sessions.pop(sid, None) is not None]
+            for sid in removed:
+                self._last_activity.pop(sid, None)
+        with SessionRepository() as repo:
+            repo.set_status(removed, status)
+        return removed
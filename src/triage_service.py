@@ -0,0 +1,31 @@
+# triage_service.py
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from db.patient_repo import UNKNOWN_NAME
+from db.unit_of_work import UnitOfWork
+
+
+def finish_triage(session_id: str, path: str, patient: Optional[Dict[str, Any]],
+                  doctor_id: Optional[int] = None, date: Optional[str] = None,
+                  record: Optional[Dict[str, Any]] = None) -> Tuple[int, int]:
+    # Patient upsert, triage row, stats and search index in one transaction (a
+    # single commit/fsync); record is the finished AI response (triage.json).
+    # Returns (patient_id, triage_id); on any error nothing is written.
+    patient = patient or {}
+    with UnitOfWork() as uow:
+        # returning patients resolve to their existing row; without a CPF the
+        # placeholder is per session so unknown patients don't collide
+        patient_id = uow.patients.upsert_by_cpf(
+            name=patient.get("name") or UNKNOWN_NAME,
+            cpf=patient.get("cpf") or f"SEM-CPF-{session_id}",
+            date_of_birth=patient.get("date_of_birth"),
+        )
+        triage_id = uow.triages.create(
+            session_id,
+            date or datetime.now().isoformat(),
+            path=path,
+            patient_id=patient_id,
+            main_doctor_id=doctor_id,
+            record=record,
+        )
+    return patient_id, triage_id
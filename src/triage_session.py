@@ -1,27 +1,44 @@
 # triage_session.py
 import os
 import json
+import re
 import uuid
+from concurrent.futures import CancelledError
 from config import CONFIG
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
+from persistence import get_writer
+import pdf_renderer
+
+_TURN_FILE = re.compile(r"turn_(\d+)\.")
 
 
 class TriageSession:
-    def __init__(self):
-        self.id = str(uuid.uuid4())
+    def __init__(self, session_id=None):
+        # session_id reopens an existing session directory (e.g. after a restart)
+        self.id = session_id or str(uuid.uuid4())
         self.path = os.path.join(CONFIG.DATA_DIR, self.id)
-        os.makedirs(self.path, exist_ok=True)
+        # the directory is created on first use (recording or write-behind artifact)
 
         self.meta = {
             "id": self.id,
             "audio_path": None,
             "ai_response": None
         }
+        self.turns = 0
+        if session_id and os.path.isdir(self.path):
+            # every digit of the number: turn_100.wav comes after turn_99.wav
+            turns = [int(m.group(1)) for m in map(_TURN_FILE.match, os.listdir(self.path)) if m]
+            self.turns = max(turns, default=0)
+
+    def next_audio_path(self, ext=".wav"):
+        # one recording per turn, kept inside the session directory
+        self.turns += 1
+        os.makedirs(self.path, exist_ok=True)
+        return os.path.join(self.path, f"turn_{self.turns:02d}{ext}")
 
     def save_json(self, data, filename="triage.json"):
-        with open(os.path.join(self.path, filename), "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        # serialized now (a snapshot of `data`), written atomically by the background writer
+        payload = json.dumps(data, indent=4, ensure_ascii=False).encode("utf-8")
+        get_writer().submit(os.path.join(self.path, filename), payload)
 
         self.meta["ai_response"] = data
 
@@ -30,42 +47,14 @@ class TriageSession:
 
     def save_pdf(self, text: str, filename="triage.pdf"):
         pdf_path = os.path.join(self.path, filename)
-        # create a simple PDF with ReportLab
-        c = canvas.Canvas(pdf_path, pagesize=A4)
-        width, height = A4
-        margin = 40
-        y = height - margin
-        line_height = 14
-
-        # Title
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(margin, y, "Prontuário de Triagem")
-        y -= 2 * line_height
-
-        c.setFont("Helvetica", 10)
-        # split text into lines that fit the page
-        max_chars = 100  # rough wrap
-        paragraphs = text.split("\n")
-        for para in paragraphs:
-            if not para:
-                y -= line_height
-                continue
-            while len(para) > 0:
-                chunk = para[:max_chars]
-                # try break on last space
-                if len(para) > max_chars:
-                    idx = chunk.rfind(" ")
-                    if idx > 10:
-                        chunk = para[:idx]
-                c.drawString(margin, y, chunk)
-                para = para[len(chunk):].lstrip()
-                y -= line_height
-                if y < margin:
-                    c.showPage()
-                    y = height - margin
-                    c.setFont("Helvetica", 10)
-
-        c.save()
+        # rendered in the PDF process pool; once the render finishes the writer
+        # fsyncs and renames it. The path is final as soon as this returns
+        # (get_writer().flush() waits for the render too)
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path, deliver = get_writer().reserve(pdf_path)
+        future = pdf_renderer.submit(text, tmp_path)
+        future.add_done_callback(lambda f: deliver(CancelledError() if f.cancelled() else f.exception()))
         # update triage meta path
         self.meta.setdefault("triage", {})["path_pdf"] = pdf_path
         return pdf_path
+
@@ -1,14 +1,20 @@
-from datetime import datetime
 import tkinter as tk
 from tkinter import ttk
 from tkinter.scrolledtext import ScrolledText
 import cv2
+import numpy as np
 from PIL import Image, ImageTk
 import threading
 import time
+from camera_pipeline import FramePipeline
 from config import CONFIG
-from db.doctor_repo import DoctorRepository
-from db.patient_repo import PatientRepository
+from outbox import Outbox
+import pdf_renderer
+from archive import SessionArchive
+import persistence
+from presence import PresenceMonitor
+from db.doctor_directory import directory as doctor_directory
+from triage_service import finish_triage
 from db.triage_repo import TriageRepository
 from triage_session import TriageSession
 from ui_doctors import DoctorUI
@@ -51,15 +57,24 @@ class UI:
         self.doctor_menu = ttk.Combobox(top_frame, textvariable=self.doctor_select_var, width=30, state="readonly")
         self.doctor_menu.pack(side="left")
 
+        self._session_values = []
+        self.triage_manager.add_listener(self._on_sessions_changed)
         self.refresh_sessions_menu()
-        self.refresh_doctor_menu()
 
-        # bind event when doctor list changes
-        self.root.bind("<<DOCTOR_UPDATED>>", lambda e: self.refresh_doctor_menu())
+        # doctor menu follows the directory's deltas (id -> label, in id order)
+        self._doctor_labels = {}
+        doctor_directory.add_listener(self._on_doctors_changed)
+        self.refresh_doctor_menu()
 
-        # Camera panel
-        self.camera_label = tk.Label(self.root)
-        self.camera_label.pack(pady=6)
+        # Camera panel: the preview is fitted to the panel, which follows the window size
+        self.camera_panel = tk.Frame(self.root, width=CONFIG.PREVIEW_WIDTH, height=CONFIG.PREVIEW_HEIGHT)
+        self.camera_panel.pack_propagate(False)
+        self.camera_panel.pack(fill="both", expand=True, pady=6)
+        self.camera_panel.bind("<Configure>", self._on_preview_resize)
+        self.camera_label = tk.Label(self.camera_panel)
+        self.camera_label.pack(expand=True)
+        self.fps_var = tk.StringVar(value="")
+        tk.Label(self.root, textvariable=self.fps_var, font=("Arial", 8), fg="gray").pack()
 
         # Control buttons
         btn_frame = tk.Frame(self.root)
@@ -82,53 +97,136 @@ class UI:
         self.cap = cv2.VideoCapture(CONFIG.CAMERA_INDEX)
         self.running = True
         self.recording = False
+        self.recording_session = None
+        self.audio_stream = None
         self.face_present = False
-        self.face_timeout = False
-        self.last_face_seen = None
 
-        # Thread camera update
-        threading.Thread(target=self.update_camera_loop, daemon=True).start()
+        # Recorded turns go to a durable outbox drained in the background, so the next
+        # patient can record right away and network outages don't lose turns
+        self._outbox_failed = 0
+        self.outbox = Outbox(self._process_outbox_item, on_change=self._on_outbox_change)
+        self.outbox.start()
+        self.archive = SessionArchive()
+
+        # Idle/active presence: after CONFIG.FACE_DETECTION_TIMEOUT without a face the
+        # pipeline drops to a low frame rate and gates detection on motion
+        self.presence = PresenceMonitor(on_state_change=self._on_presence_change)
+
+        # Capture and detection run on their own threads; the preview is drawn by the Tk loop
+        self.pipeline = FramePipeline(self.cap, self.face_detector, on_faces=self._on_faces,
+                                      presence=self.presence)
+        self.pipeline.start()
+
+        # Preview buffers are allocated once per preview size and reused every frame
+        self._preview_size = None
+        self._preview_box = (CONFIG.PREVIEW_WIDTH, CONFIG.PREVIEW_HEIGHT)
+        self._preview_bgr = None
+        self._preview_rgb = None
+        self._preview_photo = None
+        self._preview_frame_id = 0
+        self._preview_stats_at = 0.0
+        self._preview_interval_ms = max(1, int(1000 / CONFIG.PREVIEW_FPS))
+        self.root.after(self._preview_interval_ms, self.update_camera_preview)
 
         self.root.protocol("WM_DELETE_WINDOW", self.close)
 
-        # refresh sessions dropdown initially
-        self.refresh_sessions_menu()
+        # evict idle sessions periodically
+        self.root.after(CONFIG.SESSION_EVICT_INTERVAL_MS, self._evict_sessions)
 
     def open_doctors(self):
             DoctorUI(self.root)
 
-    def refresh_sessions_menu(self):
-        values = [s[0] for s in self.triage_manager.list_sessions()]
-        self.sessions_menu["values"] = values
-        if values:
-            self.selected_session_var.set(values[-1])
-
     def refresh_doctor_menu(self):
-        docs = DoctorRepository().list()
-        labels = [f"{d['id']} – {d['name']}" for d in docs]
+        # full load from the cached directory; later changes arrive as deltas
+        self._doctor_labels = {d["id"]: self._doctor_label(d) for d in doctor_directory.all()}
+        self._apply_doctor_labels()
+
+    @staticmethod
+    def _doctor_label(doc):
+        return f"{doc['id']} – {doc['name']}"
+
+    def _on_doctors_changed(self, upserted, removed):
+        try:
+            self.root.after(0, self._apply_doctor_delta, upserted, removed)
+        except (tk.TclError, RuntimeError):
+            pass
+
+    def _apply_doctor_delta(self, upserted, removed):
+        selected = self.get_selected_doctor_id()
+        known_max = max(self._doctor_labels, default=0)
+        new_ids = [d["id"] for d in upserted if d["id"] not in self._doctor_labels]
+        for doctor_id in removed:
+            self._doctor_labels.pop(doctor_id, None)
+        for d in upserted:
+            self._doctor_labels[d["id"]] = self._doctor_label(d)
+        if new_ids and min(new_ids) < known_max:
+            # new ids normally append in order; re-sort only if one landed in the middle
+            self._doctor_labels = dict(sorted(self._doctor_labels.items()))
+        self._apply_doctor_labels(selected)
+
+    def _apply_doctor_labels(self, selected=None):
+        labels = list(self._doctor_labels.values())
         self.doctor_menu["values"] = labels
-        if labels:
+        if selected in self._doctor_labels:
+            # a renamed doctor keeps the selection with the new label
+            self.doctor_select_var.set(self._doctor_labels[selected])
+        elif labels:
             self.doctor_select_var.set(labels[0])
-     
+        else:
+            self.doctor_select_var.set("")
+
     # --- Session management ---
     def create_session(self):
         session = self.triage_manager.create_session()
-        self.refresh_sessions_menu()
         self.selected_session_var.set(session.id)
         self.set_status(f"🆕 Nova triagem criada: {session.id}")
         self.response_box.insert(tk.END, f"\n[SESSION CREATED] {session.id}\n")
     
     def get_selected_doctor_id(self):
+        # answered from the in-memory labels; no database access
         val = self.doctor_select_var.get()
         if not val:
             return None
-        return int(val.split("–")[0].strip())
+        doctor_id = int(val.split("–")[0].strip())
+        return doctor_id if doctor_id in self._doctor_labels else None
     
     def refresh_sessions_menu(self):
-        values = [s[0] for s in self.triage_manager.list_sessions()]
+        # full load; after this the menu follows the manager's deltas
+        self._session_values = self.triage_manager.session_ids()
+        self._apply_session_values()
+
+    def _on_sessions_changed(self, added, removed):
+        # may be called from worker threads; apply on the Tk loop
+        try:
+            self.root.after(0, self._apply_session_delta, added, removed)
+        except (tk.TclError, RuntimeError):
+            pass
+
+    def _apply_session_delta(self, added, removed):
+        if removed:
+            gone = set(removed)
+            self._session_values = [v for v in self._session_values if v not in gone]
+        known = set(self._session_values)
+        self._session_values.extend(sid for sid in added if sid not in known)
+        self._apply_session_values()
+
+    def _apply_session_values(self):
+        values = self._session_values
         self.sessions_menu["values"] = values
-        if values:
+        # keep the current selection (another session may be recording) unless it is gone
+        if values and self.selected_session_var.get() not in values:
             self.selected_session_var.set(values[-1])
+        elif not values:
+            self.selected_session_var.set("")
+
+    def _evict_sessions(self):
+        if not self.running:
+            return
+        busy = {self.recording_session.id} if self.recording_session else set()
+        for sid in busy:
+            self.triage_manager.touch(sid)
+        self.triage_manager.evict_expired()
+        self.root.after(CONFIG.SESSION_EVICT_INTERVAL_MS, self._evict_sessions)
 
     def get_current_session(self):
         sid = self.selected_session_var.get()
@@ -137,55 +235,83 @@ class UI:
         return self.triage_manager.get_session(sid)
 
     # --- CAMERA ---
-    def update_camera_loop(self):
-        while self.running:
-            ret, frame = self.cap.read()
-            if not ret:
-                time.sleep(0.05)
-                continue
-
-            # Face detection
-            if self.face_detector:
-                faces = self.face_detector.detect(frame)
-
-                if len(faces) > 0:
-                    self.face_present = True
-                    self.last_face_seen = time.time()
-                else:
-                    if self.last_face_seen:
-                        if (time.time() - self.last_face_seen) > CONFIG.FACE_DETECTION_TIMEOUT:
-                            self.face_timeout = True
-
-                # Draw face on frame
-                for (x, y, w, h) in faces:
-                    cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-
-                # Update UI status
-                if self.face_timeout:
-                    self.status_var.set("⚠️ Rosto ausente. Encerrando triagem...")
-                elif not self.recording:
-                    self.status_var.set("👤 Rosto detectado! Selecione/Crie uma triagem.")
-                elif self.recording:
-                    self.status_var.set("🎙️ Gravando sintomas...")
-
-            # Convert frame for tkinter
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            img = Image.fromarray(frame)
-            img_tk = ImageTk.PhotoImage(img)
-
-            # update UI safely
+    def _on_faces(self, faces):
+        # runs on the detector thread
+        self.face_present = len(faces) > 0
+
+        # Update UI status
+        if self.presence.idle:
+            return
+        if self.recording:
+            self.set_status("🎙️ Gravando sintomas...")
+        elif self.face_present:
+            self.set_status("👤 Rosto detectado! Selecione/Crie uma triagem.")
+
+    def _on_presence_change(self, state):
+        # runs on the detector thread
+        if state == PresenceMonitor.IDLE:
+            self.face_present = False
+            self.set_status("💤 Rosto ausente. Modo de espera.")
+        else:
+            self.set_status("👀 Movimento detectado. Aproxime-se da câmera.")
+
+    def update_camera_preview(self):
+        # runs on the Tk main loop, rescheduled with after() at CONFIG.PREVIEW_FPS
+        if not self.running:
+            return
+
+        frame, frame_id, faces = self.pipeline.latest()
+        if frame is not None and frame_id != self._preview_frame_id:
+            self._preview_frame_id = frame_id
             try:
-                self.camera_label.config(image=img_tk)
-                self.camera_label.image = img_tk
+                self._render_preview(frame, faces)
             except tk.TclError:
                 # window closed
-                break
-
-            time.sleep(0.03)
-
-            if self.face_timeout and not self.recording:
-                time.sleep(1)
-                self.close()
+                return
+            self.pipeline.render_fps.tick()
+
+        now = time.monotonic()
+        if now - self._preview_stats_at >= 1.0:
+            self._preview_stats_at = now
+            st = self.pipeline.stats()
+            self.fps_var.set(
+                f"captura {st['capture']} fps · detecção {st['detect']} fps · "
+                f"render {st['render']} fps · descartados {st['dropped']}"
+            )
+
+        self.root.after(self._preview_interval_ms, self.update_camera_preview)
+
+    def _on_preview_resize(self, event):
+        # buffers are reallocated by _render_preview once the fitted size changes
+        self._preview_box = (max(1, event.width), max(1, event.height))
+
+    def _preview_geometry(self, frame):
+        fh, fw = frame.shape[:2]
+        box_w, box_h = self._preview_box
+        # fit the panel, never upscale past the camera resolution
+        scale = min(box_w / fw, box_h / fh, 1.0)
+        return max(1, int(fw * scale)), max(1, int(fh * scale)), scale
+
+    def _render_preview(self, frame, faces):
+        w, h, scale = self._preview_geometry(frame)
+        if self._preview_size != (w, h):
+            self._preview_size = (w, h)
+            self._preview_bgr = np.empty((h, w, 3), dtype=np.uint8)
+            self._preview_rgb = np.empty((h, w, 3), dtype=np.uint8)
+            self._preview_photo = ImageTk.PhotoImage("RGB", (w, h))
+            self.camera_label.config(image=self._preview_photo)
+            self.camera_label.image = self._preview_photo
+
+        # Resize first so the drawing/conversion only touches display-sized pixels.
+        # The capture thread owns `frame`; we only ever write into our own buffers.
+        cv2.resize(frame, (w, h), dst=self._preview_bgr, interpolation=cv2.INTER_AREA)
+        for (x, y, fw, fh) in faces:
+            cv2.rectangle(self._preview_bgr, (int(x * scale), int(y * scale)),
+                          (int((x + fw) * scale), int((y + fh) * scale)), (0, 255, 0), 2)
+        cv2.cvtColor(self._preview_bgr, cv2.COLOR_BGR2RGB, dst=self._preview_rgb)
+
+        img = Image.frombuffer("RGB", (w, h), self._preview_rgb, "raw", "RGB", 0, 1)
+        self._preview_photo.paste(img)
 
     # --- UI ACTIONS ---
     def start_recording(self):
@@ -200,7 +326,14 @@ class UI:
 
         self.response_box.insert(tk.END, f"\n🎙️ Iniciando gravação para sessão {session.id} …\n")
         self.recording = True
-        self.voice_recorder.start()
+        self.recording_session = session
+        audio_path = session.next_audio_path()
+        self.triage_manager.touch(session.id)
+        self.audio_stream = self._start_audio_stream(session)
+        # VAD end-of-utterance fires on the audio thread; stop through the same path as the button
+        self.voice_recorder.on_auto_stop = lambda: self.root.after(0, self._auto_stop_recording)
+        self.voice_recorder.start(on_chunk=self.audio_stream.push if self.audio_stream else None,
+                                  filename=audio_path)
 
         session.set_audio_path(self.voice_recorder.filename)
 
@@ -212,33 +345,88 @@ class UI:
         if not self.voice_recorder:
             return
 
-        session = self.get_current_session()
+        # the session being recorded, even if the staff already selected another one
+        session = self.recording_session or self.get_current_session()
         if session is None:
             self.set_status("❗ Selecione uma triagem antes de parar.")
             return
 
         self.recording = False
+        self.recording_session = None
         self.stop_btn.config(state="disabled")
         self.start_btn.config(state="normal")
 
         filepath = self.voice_recorder.stop()
         session.set_audio_path(filepath)
+        stream, self.audio_stream = self.audio_stream, None
+        if stream:
+            # end-of-stream marker: most of the audio is already on the server
+            stream.close()
         self.response_box.insert(tk.END, f"🛑 Gravação finalizada e salva em {filepath}\n")
+        stats = self.voice_recorder.last_stats
+        if stats:
+            self.response_box.insert(
+                tk.END,
+                f"💾 Áudio: {stats['bytes'] / 1024:.0f} KB ({stats['duration']}s), "
+                f"economia de {stats['saved_bytes'] / 1024:.0f} KB, "
+                f"{stats.get('trimmed', 0)}s de silêncio removidos\n"
+            )
         self.set_status("⏳ Enviando áudio para IA…")
 
-        # envia requisição e aguarda resposta em thread separada
-        threading.Thread(target=self._dispatch_audio_and_handle_response, args=(session,), daemon=True).start()
+        # enfileira no outbox; o envio e a resposta acontecem em segundo plano, em ordem por sessão
+        self.outbox.enqueue(session.id, session.turns, filepath,
+                            doctor_id=self.get_selected_doctor_id(), stream=stream)
+
+    def _on_outbox_change(self, pending, failed):
+        if failed and failed != self._outbox_failed:
+            self.response_box.insert(tk.END, f"\n❌ {failed} envio(s) falharam definitivamente; verifique o outbox.\n")
+        self._outbox_failed = failed
+        if pending:
+            self.set_status(f"⏳ {pending} envio(s) na fila — pode iniciar a próxima triagem.")
+        elif failed:
+            self.set_status(f"❌ {failed} envio(s) com falha definitiva.")
+
+    def _auto_stop_recording(self):
+        if self.recording:
+            self.response_box.insert(tk.END, "\n🤫 Silêncio detectado, encerrando gravação…\n")
+            self.stop_recording()
+
+    def _start_audio_stream(self, session):
+        # a stream reaches the agent while recording, outside the outbox's per-session
+        # order; with earlier turns still queued (or retrying) this turn goes by file
+        if self.outbox.pending(session.id):
+            return None
+        try:
+            return self.network_client.start_stream(session.id, self.voice_recorder.capture_rate,
+                                                    dtype=self.voice_recorder.dtype, turn=session.turns)
+        except Exception as e:
+            self.response_box.insert(tk.END, f"\n⚠️ Streaming indisponível, usando envio único: {e}\n")
+            return None
+
+    def _process_outbox_item(self, item, stream=None):
+        # runs on an outbox worker; raising schedules a retry of the same turn, or
+        # marks it failed when the error is permanent (see outbox.is_permanent)
+        session = self.triage_manager.get_session(item["session_id"]) \
+            or self.triage_manager.restore_session(item["session_id"])
+
+        def on_fallback(e):
+            self.response_box.insert(tk.END, f"\n⚠️ Falha no streaming ({e}), reenviando arquivo…\n")
 
-    def _dispatch_audio_and_handle_response(self, session: TriageSession):
         try:
-            response_json = self.network_client.send_audio(session.meta["audio_path"], session.id)
+            response_json = self.network_client.send_turn(item["audio_path"], session.id, turn=item["turn"],
+                                                          stream=stream, on_fallback=on_fallback)
         except Exception as e:
-            self.response_box.insert(tk.END, f"\n❌ Erro no envio ao agente: {e}\n")
-            self.set_status("❌ Falha no envio")
-            return
+            self.response_box.insert(
+                tk.END, f"\n❌ Erro no envio ao agente ({session.id[:8]}, tentativa {item['attempts']}): {e}\n"
+            )
+            self.set_status("❌ Falha no envio — nova tentativa em segundo plano")
+            raise
 
-        
+        self._handle_ai_response(session, response_json, item["doctor_id"])
+
+    def _handle_ai_response(self, session: TriageSession, response_json, doctor_id=None):
         ai_resp = response_json
+        self.triage_manager.touch(session.id)
 
         # save raw ai response to session filesystem
         session.save_json(ai_resp)
@@ -248,8 +436,7 @@ class UI:
         msg = ai_resp.get("message")
         patient_summary = record.get("summary") if record else None
         patient = record.get("patient") if record else None
-        doctor_id = self.get_selected_doctor_id()
-        self.response_box.insert(tk.END, f"\n🤖 IA diz: {msg}\n")
+        self.response_box.insert(tk.END, f"\n🤖 IA diz [{session.id[:8]}]: {msg}\n")
         self.set_status("✅ Resposta recebida")
 
         if status == "finished":
@@ -258,34 +445,31 @@ class UI:
             session.save_json(ai_resp) 
 
             try:
-                patient_repo = PatientRepository()
-                patient_id = patient_repo.create(
-                    name=patient.get("name", "Desconhecido"),
-                    cpf=patient.get("cpf", "000.000.000-00"),
-                    date_of_birth=patient.get("date_of_birth")
-                )
+                patient_id, triage_id = finish_triage(session.id, session.path, patient, doctor_id,
+                                                      record=ai_resp)
                 self.response_box.insert(tk.END, f"\n💾 Paciente salvo no banco. ID={patient_id}\n")
-                
-                triage = TriageRepository()
-                triage_id = triage.create(
-                    session.id, 
-                    datetime.now().isoformat(), 
-                    path=session.path, 
-                    patient_id=patient_id,
-                    main_doctor_id=doctor_id
-                )
-
                 self.response_box.insert(tk.END, f"\n💾 Triagem finalizada e salva no banco. ID={triage_id}\n")
+                if CONFIG.ARCHIVE_ON_FINISH:
+                    threading.Thread(target=self._archive_session, args=(session, triage_id), daemon=True).start()
             
             except Exception as e:
                 self.response_box.insert(tk.END, f"\n❌ Erro ao salvar no banco: {e}\n")
 
             self.triage_manager.finish_session(session.id)
-            self.refresh_sessions_menu()
             self.set_status("🏁 Triagem finalizada.")
         else:
             self.set_status("🔁 Triagem pendente - IA solicitou follow-up.")
 
+    def _archive_session(self, session: TriageSession, triage_id: int):
+        # pack the finished session once its queued artifacts are on disk
+        try:
+            persistence.get_writer().flush()
+            uri = self.archive.pack_session(session.path)
+            with TriageRepository() as repo:
+                repo.update(triage_id, {"path": uri})
+        except Exception as e:
+            self.response_box.insert(tk.END, f"\n⚠️ Falha ao arquivar sessão {session.id[:8]}: {e}\n")
+
     def show_ai_response(self, response_text):
         self.response_box.insert(tk.END, f"\n🤖 Resposta da IA:\n{response_text}\n")
 
@@ -297,6 +481,15 @@ class UI:
 
     def close(self):
         self.running = False
+        doctor_directory.remove_listener(self._on_doctors_changed)
+        self.pipeline.stop()
+        self.outbox.stop()
+        # make sure queued triage.json/PDF writes reach the disk before exiting
+        # renders still in the pool hand their PDFs to the writer before it closes
+        pdf_renderer.shutdown()
+        persistence.shutdown()
+        if self.network_client:
+            self.network_client.close()
         try:
             self.cap.release()
         except Exception:
@@ -2,6 +2,7 @@ import tkinter as tk
 from tkinter import messagebox, ttk
 from tkinter.scrolledtext import ScrolledText
 from db.doctor_repo import DoctorRepository
+from db.doctor_directory import directory
 
 
 class DoctorUI:
@@ -10,7 +11,6 @@ class DoctorUI:
         self.window = tk.Toplevel(parent)
         self.window.title("Cadastro de Médicos")
         self.window.geometry("500x400")
-        self.repo = DoctorRepository()
 
         # Form fields
         tk.Label(self.window, text="Nome:").pack(pady=(10, 0))
@@ -46,7 +46,9 @@ class DoctorUI:
         tk.Button(action_frame, text="Editar Selecionado", command=self.update_doctor).pack(side="left", padx=4)
         tk.Button(action_frame, text="Excluir Selecionado", command=self.delete_doctor).pack(side="left", padx=4)
 
+        # rows are keyed by doctor id (Treeview iid) and follow the directory's deltas
         self.refresh_list()
+        directory.add_listener(self._on_doctors_changed)
 
         self.window.protocol("WM_DELETE_WINDOW", self.close)
 
@@ -60,9 +62,8 @@ class DoctorUI:
             return
 
         try:
-            self.repo.create(name, cpf, crm)
-            self.refresh_list()
-            self.parent.event_generate("<<DOCTOR_UPDATED>>")
+            with DoctorRepository() as repo:
+                repo.create(name, cpf, crm)
         except Exception as e:
             messagebox.showerror("Erro", str(e))
 
@@ -80,9 +81,8 @@ class DoctorUI:
             "crm": self.crm_entry.get().strip() or vals[3],
         }
 
-        self.repo.update(doctor_id, updates)
-        self.refresh_list()
-        self.parent.event_generate("<<DOCTOR_UPDATED>>")
+        with DoctorRepository() as repo:
+            repo.update(doctor_id, updates)
 
     def delete_doctor(self):
         selected = self.tree.selection()
@@ -93,15 +93,47 @@ class DoctorUI:
         doctor_id = vals[0]
 
         if messagebox.askyesno("Confirmar", f"Excluir médico {vals[1]}?"):
-            self.repo.delete(doctor_id)
-            self.refresh_list()
-            self.parent.event_generate("<<DOCTOR_UPDATED>>")
+            with DoctorRepository() as repo:
+                repo.delete(doctor_id)
 
     def refresh_list(self):
         self.tree.delete(*self.tree.get_children())
-        for d in self.repo.list():
-            self.tree.insert("", "end", values=(d["id"], d["name"], d["cpf"], d.get("crm") or ""))
+        for d in directory.all():
+            self.tree.insert("", "end", iid=str(d["id"]), values=self._row(d))
+
+    @staticmethod
+    def _row(d):
+        return (d["id"], d["name"], d["cpf"], d.get("crm") or "")
+
+    def _on_doctors_changed(self, upserted, removed):
+        try:
+            self.window.after(0, self._apply_delta, upserted, removed)
+        except (tk.TclError, RuntimeError):
+            pass
+
+    def _apply_delta(self, upserted, removed):
+        if not self.window.winfo_exists():
+            return
+        for doctor_id in removed:
+            if self.tree.exists(str(doctor_id)):
+                self.tree.delete(str(doctor_id))
+        for d in upserted:
+            iid = str(d["id"])
+            if self.tree.exists(iid):
+                self.tree.item(iid, values=self._row(d))
+            else:
+                self.tree.insert("", self._position(d["id"]), iid=iid, values=self._row(d))
+
+    def _position(self, doctor_id):
+        # rows are in id order; new ids almost always go last
+        children = self.tree.get_children()
+        if not children or int(children[-1]) < doctor_id:
+            return "end"
+        for i, iid in enumerate(children):
+            if int(iid) > doctor_id:
+                return i
+        return "end"
 
     def close(self):
-        self.repo.session.close()
+        directory.remove_listener(self._on_doctors_changed)
         self.window.destroy()
@@ -1,31 +1,153 @@
+import os
+from math import gcd
 import sounddevice as sd
 import numpy as np
 from scipy.io.wavfile import write
+from scipy.signal import resample_poly
+from audio_buffer import CaptureBuffer
+from config import CONFIG
+
+try:
+    import soundfile as sf
+except (ImportError, OSError):
+    sf = None
+
+# what a session used to cost: 44.1 kHz float32 mono WAV
+_BASELINE_RATE = 44100
+_BASELINE_SAMPLE_BYTES = 4
+
+
+class VoiceActivityDetector:
+    # Per-block RMS energy and zero-crossing rate against an adaptive noise floor.
+    # The floor is kept across recordings so it follows the kiosk's environment.
+    def __init__(self, samplerate):
+        self.samplerate = samplerate
+        self.noise_floor = None
+        self.reset()
+
+    def reset(self):
+        self.position = 0
+        self.speech_start = None
+        self.speech_end = None
+
+    def process(self, block) -> bool:
+        x = block[:, 0] if block.ndim > 1 else block
+        if x.dtype.kind == "i":
+            x = x.astype(np.float32) / np.iinfo(x.dtype).max
+        rms = float(np.sqrt(np.mean(np.square(x, dtype=np.float32)))) if len(x) else 0.0
+        zcr = float(np.mean(np.signbit(x[1:]) != np.signbit(x[:-1]))) if len(x) > 1 else 0.0
+
+        if self.noise_floor is None:
+            self.noise_floor = rms
+        threshold = max(self.noise_floor * CONFIG.VAD_THRESHOLD_RATIO, CONFIG.VAD_MIN_RMS)
+        speech = rms > threshold and zcr < CONFIG.VAD_MAX_ZCR
+        if not speech:
+            self.noise_floor += CONFIG.VAD_NOISE_ADAPT * (rms - self.noise_floor)
+
+        start = self.position
+        self.position += len(x)
+        if speech:
+            if self.speech_start is None:
+                self.speech_start = start
+            self.speech_end = self.position
+        return speech
+
+    def utterance_ended(self) -> bool:
+        if self.speech_start is None:
+            return False
+        spoken = (self.speech_end - self.speech_start) / self.samplerate
+        silence = (self.position - self.speech_end) / self.samplerate
+        return spoken >= CONFIG.VAD_MIN_SPEECH_SECONDS and silence >= CONFIG.VAD_SILENCE_SECONDS
+
+    def trim_bounds(self, n_samples):
+        # whole recording when no speech was found, so nothing is silently dropped
+        if self.speech_start is None:
+            return 0, n_samples
+        pad = int(CONFIG.VAD_PADDING_SECONDS * self.samplerate)
+        return max(0, self.speech_start - pad), min(n_samples, self.speech_end + pad)
 
 
 class VoiceRecorder:
-    def __init__(self, filename="recording.wav", samplerate=44100, blocksize=1024):
+    def __init__(self, filename="recording.wav", samplerate=None, blocksize=1024, dtype=None, audio_format=None):
         self.filename = filename
-        self.samplerate = samplerate
+        self.samplerate = samplerate or CONFIG.AUDIO_SAMPLERATE
+        self.dtype = dtype or CONFIG.AUDIO_DTYPE
+        self.audio_format = (audio_format or CONFIG.AUDIO_FORMAT).lower()
         self.blocksize = blocksize
-        self.frames = []
+        self.buffer = None
         self.stream = None
         self.is_recording = False
+        self.on_chunk = None
+        self.last_stats = None
+        self._capture_rate = None
+
+        # on_auto_stop() is called once from the audio thread when the VAD sees the
+        # end of the utterance; the owner decides how to stop (e.g. the UI stop button path)
+        self.vad = None
+        self.on_auto_stop = None
+        self._auto_stop_fired = False
+
+    @property
+    def capture_rate(self) -> int:
+        # record straight at the target rate when the device allows it, otherwise at
+        # the device default and resample on stop()
+        if self._capture_rate is None:
+            try:
+                sd.check_input_settings(channels=1, dtype=self.dtype, samplerate=self.samplerate)
+                self._capture_rate = self.samplerate
+            except Exception:
+                self._capture_rate = int(sd.query_devices(kind="input")["default_samplerate"])
+        return self._capture_rate
 
     def _callback(self, indata, frames, time, status):
-        if self.is_recording:
-            self.frames.append(indata.copy())
+        if not self.is_recording:
+            return
+        if len(self.buffer) >= CONFIG.AUDIO_MAX_SECONDS * self.capture_rate:
+            # hard cap in case nobody stops the recording
+            self._fire_auto_stop()
+            return
+
+        self.buffer.append(indata)
+        if self.on_chunk:
+            self.on_chunk(indata)
+        if self.vad:
+            self.vad.process(indata)
+            if CONFIG.VAD_AUTO_STOP and self.vad.utterance_ended():
+                self._fire_auto_stop()
 
-    def start(self):
+    def _fire_auto_stop(self):
+        if self.on_auto_stop and not self._auto_stop_fired:
+            self._auto_stop_fired = True
+            self.on_auto_stop()
+
+    def start(self, on_chunk=None, filename=None):
+        # on_chunk(block) is called from the audio thread for every block; it must not
+        # block and must not keep a reference to the array (PortAudio reuses it)
         if self.is_recording:
             return
 
-        self.frames = []
+        if filename:
+            self.filename = filename
+        base, _ = os.path.splitext(self.filename)
+        if self.buffer is None or self.buffer.samplerate != self.capture_rate:
+            if self.buffer is not None:
+                self.buffer.close()
+            self.buffer = CaptureBuffer(self.capture_rate, self.dtype, CONFIG.AUDIO_BUFFER_SECONDS,
+                                        base + ".spill.wav")
+        self.buffer.reset()
+        self.buffer.spill_path = base + ".spill.wav"
+        self.on_chunk = on_chunk
+        self._auto_stop_fired = False
+        if CONFIG.VAD_ENABLED:
+            if self.vad is None or self.vad.samplerate != self.capture_rate:
+                self.vad = VoiceActivityDetector(self.capture_rate)
+            self.vad.reset()
         self.is_recording = True
 
         self.stream = sd.InputStream(
-            samplerate=self.samplerate,
+            samplerate=self.capture_rate,
             channels=1,
+            dtype=self.dtype,
             blocksize=self.blocksize,
             callback=self._callback
         )
@@ -38,8 +160,62 @@ class VoiceRecorder:
         self.is_recording = False
         self.stream.stop()
         self.stream.close()
+        self.on_chunk = None
+
+        audio = self.buffer.finalize()
+        total = len(audio)
+        recorded = total / self.capture_rate
+        if self.vad:
+            start, end = self.vad.trim_bounds(total)
+            audio = audio[start:end]
+        if self.capture_rate != self.samplerate:
+            audio = self._resample(audio, self.capture_rate, self.samplerate)
+
+        base, _ = os.path.splitext(self.filename)
+        if self.buffer.spilled and len(audio) == total and self.audio_format == "wav" \
+                and self.capture_rate == self.samplerate:
+            # the spill file already is the finished WAV
+            del audio
+            path = base + ".wav"
+            os.replace(self.buffer.spill_path, path)
+            duration = recorded
+        else:
+            path = self._write(audio)
+            duration = len(audio) / self.samplerate
+            del audio
+            self.buffer.discard_spill()
+
+        self.last_stats = self._stats(path, duration)
+        self.last_stats["trimmed"] = round(recorded - self.last_stats["duration"], 2)
+        return path
+
+    def _resample(self, audio, src_rate, dst_rate):
+        g = gcd(src_rate, dst_rate)
+        out = resample_poly(audio.astype(np.float32), dst_rate // g, src_rate // g, axis=0)
+        if np.dtype(self.dtype).kind == "i":
+            info = np.iinfo(self.dtype)
+            out = np.clip(np.round(out), info.min, info.max)
+        return out.astype(self.dtype)
+
+    def _write(self, audio):
+        base, _ = os.path.splitext(self.filename)
+        if self.audio_format == "flac" and sf is not None:
+            path = base + ".flac"
+            sf.write(path, audio, self.samplerate, format="FLAC", subtype="PCM_16")
+            return path
 
-        audio = np.concatenate(self.frames, axis=0)
+        # WAV, or FLAC requested without an encoder available
+        path = base + ".wav"
+        write(path, self.samplerate, audio)
+        return path
 
-        write(self.filename, self.samplerate, audio)
-        return self.filename
+    def _stats(self, path, duration):
+        size = os.path.getsize(path)
+        baseline = int(duration * _BASELINE_RATE) * _BASELINE_SAMPLE_BYTES + 44
+        return {
+            "path": path,
+            "duration": round(duration, 2),
+            "bytes": size,
+            "baseline_bytes": baseline,
+            "saved_bytes": baseline - size,
+        }
@@ -0,0 +1,45 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+# db.config binds its engine on import, so point it at a scratch database first
+os.environ["ROBO_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="robo-tests-"), "test.db")
+
+from stub_server import StubServer  # noqa: E402
+
+
+@pytest.fixture
+def make_stub():
+    servers = []
+
+    def _make(**kwargs):
+        server = StubServer(**kwargs).start_background()
+        servers.append(server)
+        return server
+
+    yield _make
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def wav_file(tmp_path):
+    path = tmp_path / "turn.wav"
+    path.write_bytes(b"RIFF" + os.urandom(4000))
+    return str(path)
+
+
+@pytest.fixture
+def db():
+    from db.config import engine
+    from db.models import Base
+    from db.triage_search import reset_search_table
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    reset_search_table(engine)
+    return engine
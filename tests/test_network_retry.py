@@ -0,0 +1,137 @@
+import pytest
+import requests
+
+import network_client
+from config import CONFIG
+from network_client import NetworkClient
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(network_client.time, "sleep", delays.append)
+    monkeypatch.setattr(CONFIG, "HTTP_RETRIES", 3)
+    monkeypatch.setattr(CONFIG, "HTTP_BACKOFF_BASE", 0.5)
+    monkeypatch.setattr(CONFIG, "HTTP_BACKOFF_MAX", 8)
+    return delays
+
+
+@pytest.fixture
+def closed(monkeypatch):
+    responses = []
+    close = requests.Response.close
+
+    def spy(self):
+        responses.append(self.status_code)
+        close(self)
+
+    monkeypatch.setattr(requests.Response, "close", spy)
+    return responses
+
+
+def test_retries_with_backoff_and_same_key(make_stub, sleeps, closed, wav_file):
+    stub = make_stub(turns=1, fail_first=2)
+    net = NetworkClient(stub.url)
+
+    reply = net.send_audio(wav_file, "s1", turn=3, encoding="json")
+
+    assert reply["status"] == "finished"
+    assert len(sleeps) == 2
+    assert 0.25 <= sleeps[0] <= 0.5 and 0.5 <= sleeps[1] <= 1.0
+    # both 502s were released before backing off
+    assert closed[:2] == [502, 502]
+    assert [r["status"] for r in stub.requests] == [502, 502, 200]
+    assert [r["idempotency_key"] for r in stub.requests] == ["s1:3"] * 3
+    net.close()
+
+
+def test_gives_up_after_the_last_attempt(make_stub, sleeps, wav_file):
+    stub = make_stub(turns=1, fail_first=10)
+    net = NetworkClient(stub.url)
+
+    with pytest.raises(requests.HTTPError) as exc:
+        net.send_audio(wav_file, "s2", turn=0, encoding="binary")
+
+    assert exc.value.response.status_code == 502
+    assert len(sleeps) == CONFIG.HTTP_RETRIES
+    assert stub.fail_first == 10 - (CONFIG.HTTP_RETRIES + 1)
+    assert [r["idempotency_key"] for r in stub.requests] == ["s2:0"] * (CONFIG.HTTP_RETRIES + 1)
+    net.close()
+
+
+def test_backoff_is_capped(make_stub, sleeps, monkeypatch, wav_file):
+    monkeypatch.setattr(CONFIG, "HTTP_RETRIES", 6)
+    monkeypatch.setattr(CONFIG, "HTTP_BACKOFF_MAX", 2)
+    stub = make_stub(turns=1, fail_first=6)
+    net = NetworkClient(stub.url)
+
+    net.send_audio(wav_file, "s3", turn=0, encoding="multipart")
+
+    assert max(sleeps) <= 2
+    net.close()
+
+
+def test_connection_errors_are_retried(sleeps, wav_file):
+    net = NetworkClient("http://127.0.0.1:9/")
+
+    with pytest.raises(requests.ConnectionError):
+        net.send_audio(wav_file, "s4", turn=0)
+
+    assert len(sleeps) == CONFIG.HTTP_RETRIES
+    net.close()
+
+
+def test_client_errors_are_not_retried(make_stub, sleeps, monkeypatch, wav_file):
+    # gzip bodies go out chunked, which this stub answers with 411
+    monkeypatch.setattr(CONFIG, "AUDIO_UPLOAD_GZIP", True)
+    stub = make_stub(reject_chunked=True)
+    net = NetworkClient(stub.url)
+
+    with pytest.raises(requests.HTTPError) as exc:
+        net.send_audio(wav_file, "s5", turn=0, encoding="binary")
+
+    assert exc.value.response.status_code == 411
+    assert sleeps == []
+    net.close()
+
+
+def test_repeated_key_gets_the_cached_reply(make_stub, wav_file):
+    stub = make_stub(turns=2)
+    net = NetworkClient(stub.url)
+
+    first = net.send_audio(wav_file, "s6", turn=0, encoding="json")
+    replay = net.send_audio(wav_file, "s6", turn=0, encoding="json")
+    second = net.send_audio(wav_file, "s6", turn=1, encoding="json")
+
+    assert first == replay and first["status"] == "pending"
+    assert second["status"] == "finished"
+    assert [r["idempotency_key"] for r in stub.requests] == ["s6:0", "s6:0", "s6:1"]
+    net.close()
+
+
+def test_keys_without_a_turn_are_unique():
+    assert NetworkClient.idempotency_key("s7") != NetworkClient.idempotency_key("s7")
+    assert NetworkClient.idempotency_key("s7", 2) == "s7:2"
+
+
+@pytest.mark.parametrize("encoding", ["multipart", "binary"])
+def test_gzip_bodies_release_the_file_when_the_post_fails(sleeps, monkeypatch, wav_file, encoding):
+    monkeypatch.setattr(CONFIG, "AUDIO_UPLOAD_GZIP", True)
+    monkeypatch.setattr(CONFIG, "HTTP_RETRIES", 1)
+    opened = []
+    real_open = open
+
+    def spy_open(path, *args, **kwargs):
+        f = real_open(path, *args, **kwargs)
+        if path == wav_file:
+            opened.append(f)
+        return f
+
+    monkeypatch.setattr("builtins.open", spy_open)
+    net = NetworkClient("http://127.0.0.1:9/")
+
+    with pytest.raises(requests.ConnectionError):
+        net.send_audio(wav_file, "s8", turn=0, encoding=encoding)
+
+    assert len(opened) == 2 and all(f.closed for f in opened)
+    net.close()
@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+import requests
+
+from config import CONFIG
+from network_client import AudioStream, NetworkClient
+
+
+@pytest.fixture
+def client(make_stub, monkeypatch):
+    def _client(**stub_kwargs):
+        stub = make_stub(**stub_kwargs)
+        monkeypatch.setattr(CONFIG, "AUDIO_UPLOAD_MODE", "stream")
+        monkeypatch.setattr(CONFIG, "N8N_STREAM_ENDPOINT", stub.url + "/stream")
+        monkeypatch.setattr(CONFIG, "AUDIO_UPLOAD_ENCODING", "json")
+        return NetworkClient(stub.url), stub
+
+    return _client
+
+
+def test_stream_sends_chunks(make_stub):
+    stub = make_stub(turns=1)
+    stream = AudioStream(stub.url + "/stream", "s1", 16000, dtype="int16")
+    chunks = [np.full((800, 1), i, dtype=np.int16) for i in range(10)]
+    for chunk in chunks:
+        stream.push(chunk)
+
+    reply = stream.result(timeout=10)
+
+    assert reply["status"] == "finished"
+    assert stream.bytes_sent == sum(c.nbytes for c in chunks)
+    assert stub.requests == [{"session_id": "s1", "bytes": stream.bytes_sent, "mode": "stream",
+                              "idempotency_key": None, "status": 200}]
+
+
+def test_send_turn_uses_stream_reply(client, wav_file):
+    net, stub = client(turns=2)
+    stream = net.start_stream("s2", 16000, dtype="int16", turn=0)
+    stream.push(np.zeros((1600, 1), dtype=np.int16))
+    fallbacks = []
+
+    reply = net.send_turn(wav_file, "s2", turn=0, stream=stream, on_fallback=fallbacks.append)
+
+    assert reply["status"] == "pending"
+    assert fallbacks == []
+    assert [r["mode"] for r in stub.requests] == ["stream"]
+    assert stub.requests[0]["idempotency_key"] == "s2:0"
+    net.close()
+
+
+def test_send_turn_falls_back_when_chunked_is_rejected(client, wav_file):
+    net, stub = client(turns=1, reject_chunked=True)
+    stream = net.start_stream("s3", 16000, dtype="int16", turn=0)
+    stream.push(np.zeros((1600, 1), dtype=np.int16))
+    fallbacks = []
+
+    reply = net.send_turn(wav_file, "s3", turn=0, stream=stream, on_fallback=fallbacks.append)
+
+    assert reply["status"] == "finished"
+    assert len(fallbacks) == 1
+    assert isinstance(fallbacks[0], requests.HTTPError)
+    assert fallbacks[0].response.status_code == 411
+    # the rejected stream never reached the agent; only the one-shot upload did
+    assert [r["mode"] for r in stub.requests] == ["json"]
+    assert stub.requests[0]["bytes"] == 4004
+    net.close()
+
+
+def test_send_turn_falls_back_when_stream_endpoint_is_down(client, wav_file, monkeypatch):
+    net, stub = client(turns=1)
+    monkeypatch.setattr(CONFIG, "N8N_STREAM_ENDPOINT", "http://127.0.0.1:9/stream")
+    stream = net.start_stream("s4", 16000, dtype="int16", turn=0)
+    fallbacks = []
+
+    reply = net.send_turn(wav_file, "s4", turn=0, stream=stream, on_fallback=fallbacks.append)
+
+    assert reply["status"] == "finished"
+    assert isinstance(fallbacks[0], requests.ConnectionError)
+    assert [r["mode"] for r in stub.requests] == ["json"]
+    net.close()
+
+
+def test_no_stream_in_oneshot_mode(client, monkeypatch):
+    net, _ = client()
+    monkeypatch.setattr(CONFIG, "AUDIO_UPLOAD_MODE", "oneshot")
+    assert net.start_stream("s5", 16000) is None
+    net.close()
+
+
+@pytest.mark.parametrize("encoding,gzip", [
+    ("json", False), ("multipart", False), ("multipart", True), ("binary", False), ("binary", True),
+])
+def test_oneshot_encodings(make_stub, monkeypatch, wav_file, encoding, gzip):
+    stub = make_stub(turns=1)
+    monkeypatch.setattr(CONFIG, "AUDIO_UPLOAD_GZIP", gzip)
+    net = NetworkClient(stub.url)
+
+    reply = net.send_audio(wav_file, "s6", turn=0, encoding=encoding)
+
+    assert reply["status"] == "finished"
+    assert stub.requests[0]["mode"] == encoding
+    assert stub.requests[0]["bytes"] == 4004
+    net.close()
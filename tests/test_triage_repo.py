@@ -0,0 +1,78 @@
+import pytest
+from sqlalchemy import text
+
+from db.patient_repo import PatientRepository
+from db.triage_repo import TriageRepository
+
+
+@pytest.fixture
+def patient_id(db):
+    with PatientRepository() as repo:
+        return repo.create("Ana", "111")
+
+
+def _pages(repo, limit, **filters):
+    pages, cursor = [], None
+    while True:
+        rows, cursor = repo.page(after=cursor, limit=limit, **filters)
+        pages.append([r["id"] for r in rows])
+        if cursor is None or len(pages) > 20:
+            return pages
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 7, 10])
+def test_page_within_one_second(db, patient_id, limit):
+    # server_default timestamps have one-second resolution, so every row ties on created_at
+    with TriageRepository() as repo:
+        ids = [repo.create(f"s{i}", None, None, patient_id) for i in range(7)]
+        pages = _pages(repo, limit)
+
+    seen = [i for page in pages for i in page]
+    assert seen == sorted(ids, reverse=True)
+
+
+def test_page_across_seconds(db, patient_id):
+    with TriageRepository() as repo:
+        ids = [repo.create(f"s{i}", None, None, patient_id) for i in range(9)]
+    stamps = ["2026-01-01 10:00:00", "2026-01-01 10:00:01", "2026-01-02 09:00:00"]
+    with db.begin() as conn:
+        for n, triage_id in enumerate(ids):
+            conn.execute(text("UPDATE triages SET created_at = :at WHERE id = :id"),
+                         {"at": stamps[n % 3], "id": triage_id})
+
+    with TriageRepository() as repo:
+        pages = _pages(repo, 2, patient_id=patient_id)
+
+    seen = [i for page in pages for i in page]
+    expected = sorted(ids, key=lambda i: (stamps[ids.index(i) % 3], i), reverse=True)
+    assert seen == expected
+    assert all(len(page) == 2 for page in pages[:-1])
+
+
+def _record(summary, name, cpf):
+    return {"status": "finished", "message": "ok",
+            "record": {"summary": summary, "patient": {"name": name, "cpf": cpf}}}
+
+
+def test_delete_triage_removes_search_row(db, patient_id):
+    with TriageRepository() as repo:
+        gone = repo.create("s1", None, None, patient_id, record=_record("dor de cabeça", "Ana", "111"))
+        kept = repo.create("s2", None, None, patient_id, record=_record("febre e cabeça", "Ana", "111"))
+        assert repo.delete(gone)
+        assert [h["id"] for h in repo.search("cabeca")] == [kept]
+
+
+def test_delete_patient_removes_cascaded_search_rows(db, patient_id):
+    with PatientRepository() as patients:
+        other = patients.create("Bia", "222")
+    with TriageRepository() as repo:
+        repo.create("s1", None, None, patient_id, record=_record("tosse seca", "Ana", "111"))
+        repo.create("s2", None, None, patient_id, record=_record("tosse com febre", "Ana", "111"))
+        kept = repo.create("s3", None, None, other, record=_record("tosse leve", "Bia", "222"))
+
+    with PatientRepository() as patients:
+        assert patients.delete(patient_id)
+
+    with TriageRepository() as repo:
+        assert [h["id"] for h in repo.search("tosse")] == [kept]
+        assert repo.search("Ana") == [] and repo.search("111") == []